@@ -3,38 +3,93 @@ from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from services.executor import ProcedureExecutor
 from services.code_generator import CodeGenerator
+from services.tracer import Tracer
+from services.registry import FileRegistry
+from services.log_buffer import CursorMismatch, LogBuffer
+from services import importer
+from services.binary_payload import read_payload, check_content_length, PayloadError
+from services.profiler import Profiler, ProfilerError
+from services.admission import (AdmissionController, AdmissionRejected, Deadline,
+                                DeadlineExceeded, DuplicateExecution, EXECUTION_ID_RE,
+                                ExecutionCancelled, SharedExecutions, parse_timeout_ms)
 import time
+import math
+import base64
+import hmac
+import uuid
 import os
 import zipfile
 from io import BytesIO
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*")
+# En modo multi-proceso (serve.py) los eventos viajan por una cola de mensajes compartida
+socketio = SocketIO(app, cors_allowed_origins="*",
+                    message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'))
 
 executor = ProcedureExecutor()
 code_generator = CodeGenerator()
+tracer = Tracer()
+log_buffer = LogBuffer()
+admission = AdmissionController()
+profiler = Profiler()
+
+# Tiempo límite por defecto de /api/execute (ms); timeoutMs o X-Timeout-Ms lo reemplazan
+DEFAULT_TIMEOUT_MS = int(os.environ.get('EXECUTE_TIMEOUT_MS', '10000'))
+active_executions = {}
+# serve.py indica cuántos workers comparten el puerto; el estado en memoria es de cada uno
+MULTI_PROCESS = int(os.environ.get('SERVE_WORKERS', '1')) > 1
+# Con varios workers las ejecuciones en curso se anotan en un directorio compartido
+# para detectar ids repetidos y cancelar desde cualquier worker
+shared_executions = None
+if MULTI_PROCESS and os.environ.get('EXECUTIONS_DIR'):
+    shared_executions = SharedExecutions(os.environ['EXECUTIONS_DIR'])
 
 executor.set_socketio(socketio)
+executor.set_tracer(tracer)
+executor.set_log_buffer(log_buffer)
 
-@app.route('/api/procedures', methods=['POST'])
-def register_procedures():
-    data = request.json
-    protocol = data.get('protocol')
-    transport = data.get('transport')
-    procedures = data.get('procedures', [])
-    
-    executor.register(protocol, transport, procedures)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACES_DIR = os.path.join(BASE_DIR, 'traces')
+
+# Registro persistente: REGISTRY_PATH="" lo desactiva
+REGISTRY_PATH = os.environ.get('REGISTRY_PATH', os.path.join(BASE_DIR, 'data', 'registry'))
+registry = None
+
+if REGISTRY_PATH:
+    registry = FileRegistry(REGISTRY_PATH)
+    executor.set_registry(registry)
+    for saved_protocol, saved_files in registry.artifacts.items():
+        code_generator.restore(saved_protocol, saved_files)
+
+def register_and_generate(protocol, transport, procedures, include_code=True):
+    """Registrar procedimientos, generar su código y guardar los artefactos"""
+    try:
+        executor.register(protocol, transport, procedures)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     
     # Generar código
     try:
-        generated = code_generator.generate_all(protocol, transport, procedures)
+        with profiler.profile('generate_all'):
+            generated = code_generator.generate_all(protocol, transport, procedures)
+        
+        if registry is not None:
+            files = {}
+            for filename, path in generated['files'].items():
+                with open(path, 'r') as f:
+                    files[filename] = f.read()
+            registry.save_artifacts(protocol, files)
+        
         return jsonify({
             'success': True,
             'message': f'{len(procedures)} procedimientos registrados',
             'protocol': protocol,
             'transport': transport,
-            'generated': generated
+            'generated': generated if include_code else {'files': generated['files']}
         })
     except Exception as e:
         return jsonify({
@@ -42,37 +97,371 @@ def register_procedures():
             'error': str(e)
         }), 500
 
-
-@app.route('/api/execute', methods=['POST'])
-def execute_procedure():
+@app.route('/api/procedures', methods=['POST'])
+def register_procedures():
     data = request.json
-    procedure_name = data.get('procedureName')
-    parameters = data.get('parameters', {})
+    protocol = data.get('protocol')
+    transport = data.get('transport')
+    procedures = data.get('procedures', [])
+    
+    return register_and_generate(protocol, transport, procedures)
+
+@app.route('/api/procedures/import', methods=['POST'])
+def import_procedures():
+    """Importar procedimientos desde archivos .proto, interfaces Java RMI o C#.
+    
+    Acepta uno o más archivos multipart en el campo "file", o el archivo como cuerpo
+    crudo con ?format=proto|java|csharp. El contenido se procesa como stream.
+    """
+    protocol = request.args.get('protocol') or request.form.get('protocol')
+    transport = request.args.get('transport') or request.form.get('transport') or 'tcp'
     
+    try:
+        procedures = []
+        uploads = request.files.getlist('file')
+        if uploads:
+            formats = []
+            for upload in uploads:
+                fmt = request.args.get('format') or importer.detect_format(upload.filename or '')
+                if fmt is None:
+                    raise importer.ParseError(f'No se reconoce el formato de {upload.filename}')
+                formats.append(fmt)
+            # El registro tiene un solo protocolo: archivos de formatos distintos necesitan uno explícito
+            if len(set(formats)) > 1 and not protocol:
+                raise importer.ParseError(
+                    'Los archivos tienen formatos distintos; impórtalos por separado o indica ?protocol=')
+            for upload, fmt in zip(uploads, formats):
+                procedures.extend(importer.import_procedures(upload.stream, fmt))
+        else:
+            fmt = request.args.get('format')
+            if fmt is None:
+                raise importer.ParseError('Indica el formato con ?format=proto|java|csharp')
+            procedures = importer.import_procedures(request.stream, fmt)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    if not procedures:
+        return jsonify({
+            'success': False,
+            'error': 'No se encontraron procedimientos en el archivo'
+        }), 400
+    
+    protocol = protocol or importer.DEFAULT_PROTOCOLS[fmt]
+    return register_and_generate(protocol, transport, procedures, include_code=False)
+
+
+def request_timeout(value):
+    """timeoutMs del cliente, o la cabecera X-Timeout-Ms, o el valor por defecto (0 no es "sin valor")"""
+    if value is None:
+        value = request.headers.get('X-Timeout-Ms')
+    return DEFAULT_TIMEOUT_MS if value is None else value
+
+def run_execution(request_id, timeout_ms, prepare):
+    """Ejecutar con tiempo límite y control de admisión; devuelve (respuesta, status).
+    
+    ``prepare(deadline)`` devuelve (procedureName, parameters) y se llama recién cuando la
+    ejecución fue admitida, así leer el cuerpo también queda dentro del límite de concurrencia.
+    """
     start_time = time.time()
+    if not EXECUTION_ID_RE.match(request_id):
+        return jsonify({'success': False, 'error': 'X-Request-Id inválido'}), 400
+    try:
+        deadline = Deadline(parse_timeout_ms(timeout_ms))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # El id identifica la ejecución para cancelarla: no puede haber dos en curso
+    if request_id in active_executions:
+        return jsonify({'success': False, 'error': f'Ya hay una ejecución en curso con id {request_id}'}), 409
+    if shared_executions is not None:
+        try:
+            shared_executions.register(request_id)
+        except DuplicateExecution as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        deadline.cancel_check = lambda: shared_executions.cancel_requested(request_id)
+    active_executions[request_id] = deadline
+    try:
+        return execute_admitted(request_id, prepare, deadline, start_time)
+    finally:
+        del active_executions[request_id]
+        if shared_executions is not None:
+            shared_executions.unregister(request_id)
+
+def execute_admitted(request_id, prepare, deadline, start_time):
+    """Reservar un lugar de ejecución, preparar los parámetros, ejecutar y liberarlo"""
+    try:
+        with tracer.span('api.admission'):
+            admission.acquire(deadline)
+    except AdmissionRejected as e:
+        response = jsonify({
+            'success': False,
+            'error': str(e),
+            'retryAfterMs': e.retry_after_ms
+        })
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after_ms / 1000))
+        response.headers['X-Request-Id'] = request_id
+        return response, e.status
+    
+    try:
+        procedure_name, parameters = prepare(deadline)
+    except PayloadError as e:
+        admission.release()
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['X-Request-Id'] = request_id
+        return response, e.status
+    except BaseException:
+        # Cualquier otro error (p. ej. el cliente cortó la subida) también libera el lugar
+        admission.release()
+        raise
     
     try:
-        result = executor.execute(procedure_name, parameters)
+        with tracer.span('api.execute', {'procedure': procedure_name}), profiler.profile('execute'):
+            result = executor.execute(procedure_name, parameters, deadline)
         latency = int((time.time() - start_time) * 1000)
         
         # Enviar log final con latencia
         executor.emit_log('success', f'⚡ Latencia: {latency}ms')
         
-        return jsonify({
-            'success': True,
-            'result': result,
-            'latency': latency
-        })
+        # Resultados binarios viajan en base64 dentro del JSON
+        if isinstance(result, (bytes, bytearray, memoryview)):
+            result = base64.b64encode(result).decode('ascii')
+        
+        with tracer.span('api.jsonify'):
+            response = jsonify({
+                'success': True,
+                'result': result,
+                'latency': latency
+            })
+        status = 200
     except Exception as e:
         latency = int((time.time() - start_time) * 1000)
         executor.emit_log('error', f'✗ Error: {str(e)}')
         executor.emit_log('error', f'✗ La llamada falló después de {latency}ms')
         
-        return jsonify({
+        response = jsonify({
             'success': False,
             'error': str(e),
             'latency': latency
-        }), 400
+        })
+        if isinstance(e, DeadlineExceeded):
+            status = 504
+        elif isinstance(e, ExecutionCancelled):
+            status = 499
+        else:
+            status = 400
+    finally:
+        admission.release(time.time() - start_time)
+    
+    response.headers['X-Request-Id'] = request_id
+    return response, status
+
+@app.route('/api/execute', methods=['POST'])
+def execute_procedure():
+    request_id = request.headers.get('X-Request-Id') or uuid.uuid4().hex
+    tracer.begin(request_id)
+    try:
+        with tracer.span('api.parse_request'):
+            data = request.json
+            procedure_name = data.get('procedureName')
+            parameters = data.get('parameters', {})
+            timeout_ms = request_timeout(data.get('timeoutMs'))
+        
+        return run_execution(request_id, timeout_ms, lambda deadline: (procedure_name, parameters))
+    finally:
+        tracer.end()
+
+@app.route('/api/execute/binary', methods=['POST'])
+def execute_binary():
+    """Ejecutar con parámetros byte[] en un cuerpo binario con prefijo de longitud.
+    
+    Ver services/binary_payload.py para el formato. Los parámetros binarios llegan al
+    procedimiento como memoryview sin copias; los cuerpos grandes se vuelcan a disco.
+    El cuerpo se lee después de la admisión: el tiempo límite inicial sale de X-Timeout-Ms
+    (o el valor por defecto) y el timeoutMs del header solo puede acortarlo.
+    """
+    request_id = request.headers.get('X-Request-Id') or uuid.uuid4().hex
+    tracer.begin(request_id)
+    payloads = []
+    
+    def prepare(deadline):
+        with tracer.span('api.read_binary', {'bytes': request.content_length}):
+            payload = read_payload(request.stream, request.content_length)
+        payloads.append(payload)
+        try:
+            timeout_ms = parse_timeout_ms(payload.header.get('timeoutMs'))
+        except ValueError as e:
+            raise PayloadError(str(e))
+        if timeout_ms is not None:
+            deadline.tighten(timeout_ms)
+        return payload.header.get('procedureName'), payload.parameters
+    
+    try:
+        if request.content_length is None:
+            return jsonify({'success': False, 'error': 'Se requiere Content-Length'}), 411
+        # Rechazar cuerpos demasiado grandes sin ocupar un lugar de ejecución ni leerlos
+        try:
+            check_content_length(request.content_length)
+        except PayloadError as e:
+            return jsonify({'success': False, 'error': str(e)}), e.status
+        
+        return run_execution(request_id, request_timeout(None), prepare)
+    finally:
+        for payload in payloads:
+            payload.close()
+        tracer.end()
+
+@app.route('/api/execute/<request_id>/cancel', methods=['POST'])
+def cancel_execution(request_id):
+    """Cancelar una ejecución en curso (se detiene en la siguiente etapa).
+    
+    Con varios workers la ejecución puede estar en otro proceso: se deja el pedido en el
+    directorio compartido y el dueño lo detecta en su próxima revisión.
+    """
+    deadline = active_executions.get(request_id)
+    if deadline is not None:
+        deadline.cancel()
+    elif not (shared_executions is not None and EXECUTION_ID_RE.match(request_id)
+              and shared_executions.request_cancel(request_id)):
+        return jsonify({'success': False, 'error': 'Ejecución no encontrada'}), 404
+    
+    return jsonify({'success': True, 'requestId': request_id})
+
+@app.route('/api/execute/status', methods=['GET'])
+def execution_status():
+    """Estado del control de admisión"""
+    return jsonify({'success': True, **admission.stats()})
+
+def query_logs(since, limit, epoch):
+    """Consultar el historial validando la epoch del cursor; devuelve (respuesta, status).
+
+    Con serve.py el historial es compartido: cualquier worker responde desde cualquier cursor.
+    """
+    try:
+        return {'success': True, **log_buffer.query(since, limit, epoch)}, 200
+    except CursorMismatch as e:
+        # El historial se reinició: el cliente debe reiniciar su cursor con la epoch y lastSeq actuales
+        return {'success': False, 'error': str(e),
+                'epoch': log_buffer.epoch, 'lastSeq': log_buffer.last_seq}, 409
+
+@app.route('/api/logs', methods=['GET'])
+def get_logs():
+    """Historial de logs posterior a una secuencia, paginado"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since y limit deben ser enteros'}), 400
+    
+    body, status = query_logs(since, limit, request.args.get('epoch'))
+    return jsonify(body), status
+
+def admin_authorized():
+    """Los endpoints /api/admin requieren X-Admin-Token igual a ADMIN_TOKEN; sin ADMIN_TOKEN quedan cerrados"""
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        return False
+    given = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(given.encode('utf-8'), token.encode('utf-8'))
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """GET: estado de la sesión. POST: iniciar una sesión acotada por tiempo y llamadas"""
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    if request.method == 'GET':
+        session = profiler.session
+        return jsonify({'success': True, 'session': session.status() if session else None})
+    
+    data = request.json or {}
+    try:
+        session = profiler.start(
+            mode=data.get('mode'),
+            seconds=data.get('seconds', 10),
+            requests=data.get('requests', 100),
+            interval_ms=data.get('intervalMs', 10)
+        )
+    except ProfilerError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409 if profiler.session and profiler.session.active else 400
+    
+    return jsonify({'success': True, 'session': session.status()})
+
+@app.route('/api/admin/profile/stop', methods=['POST'])
+def admin_profile_stop():
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    session = profiler.stop()
+    return jsonify({'success': True, 'session': session.status() if session else None})
+
+@app.route('/api/admin/profile/result', methods=['GET'])
+def admin_profile_result():
+    """Resultados de la última sesión: ?format=collapsed|pstats|prof"""
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    session = profiler.session
+    if session is None:
+        return jsonify({'success': False, 'error': 'No hay sesiones de perfilado'}), 404
+    
+    fmt = request.args.get('format', 'collapsed')
+    if fmt == 'collapsed':
+        return app.response_class(session.collapsed(), mimetype='text/plain')
+    if fmt in ('pstats', 'prof') and session.mode != 'cprofile':
+        return jsonify({'success': False, 'error': 'pstats solo está disponible en modo cprofile'}), 400
+    if fmt == 'pstats':
+        sort = request.args.get('sort', 'cumulative')
+        try:
+            limit = int(request.args.get('limit', 50))
+            text = session.pstats_text(sort, limit)
+        except (KeyError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return app.response_class(text, mimetype='text/plain')
+    if fmt == 'prof':
+        return send_file(BytesIO(session.pstats_dump()), mimetype='application/octet-stream',
+                         as_attachment=True, download_name='profile.prof')
+    
+    return jsonify({'success': False, 'error': 'format debe ser collapsed, pstats o prof'}), 400
+
+@app.route('/api/trace', methods=['GET'])
+def trace_status():
+    """Estado del tracer: tasa de muestreo y eventos en memoria"""
+    return jsonify({'success': True, **tracer.stats()})
+
+@app.route('/api/trace/config', methods=['POST'])
+def trace_config():
+    """Cambiar la tasa de muestreo de trazas en caliente"""
+    data = request.json or {}
+    try:
+        tracer.set_sample_rate(data.get('sampleRate', tracer.sample_rate))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, **tracer.stats()})
+
+@app.route('/api/trace/export', methods=['POST'])
+def trace_export():
+    """Exportar las trazas en memoria a un archivo JSON (Chrome trace / Perfetto)"""
+    data = request.json or {}
+    clear = bool(data.get('clear', False))
+    
+    try:
+        filename = f'trace-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.json'
+        path = os.path.join(TRACES_DIR, filename)
+        count = tracer.export(path, clear=clear)
+        return jsonify({
+            'success': True,
+            'path': path,
+            'events': count
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 @app.route('/api/connect', methods=['POST'])
 def connect():
@@ -176,9 +565,22 @@ def preview_code():
         }), 500
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     print('Cliente conectado al WebSocket')
-    emit('connection_response', {'status': 'connected'})
+    emit('connection_response', {'status': 'connected', 'epoch': log_buffer.epoch,
+                                 'lastSeq': log_buffer.last_seq})
+    
+    # Reenviar los logs que el cliente no vio: io(url, { auth: { since: <seq>, epoch: <epoch> } })
+    auth = auth or {}
+    since = auth.get('since', request.args.get('since'))
+    if since is not None:
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            return
+        body, _ = query_logs(since, log_buffer.capacity, auth.get('epoch', request.args.get('epoch')))
+        body.pop('success')
+        emit('log_replay', body)
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -0,0 +1,65 @@
+"""Throughput de /api/execute/binary (decodificación del cuerpo) frente a JSON + base64.
+
+Mide solo la lectura del payload hasta tener los parámetros listos para el procedimiento;
+las etapas simuladas del ejecutor (~0.9 s) no se incluyen.
+
+Uso (desde backend/):
+    python benchmarks/bench_binary.py
+"""
+import base64
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.binary_payload import encode_payload, read_payload  # noqa: E402
+
+
+SIZES = [1024, 64 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]
+
+
+def _label(size):
+    if size >= 1024 * 1024:
+        return f'{size // (1024 * 1024)} MB'
+    return f'{size // 1024} KB'
+
+
+def _throughput(fn, size, min_time=0.5):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return size * runs / elapsed / (1024 * 1024)
+
+
+def main():
+    print(f'{"tamaño":>8} {"binario":>12} {"binario+disco":>14} {"json+base64":>12}   (MB/s)')
+    for size in SIZES:
+        data = os.urandom(size)
+        body = encode_payload('procesar', {'modo': 'rapido'}, {'data': data})
+        json_body = json.dumps({'procedureName': 'procesar',
+                                'parameters': {'data': base64.b64encode(data).decode('ascii')}}).encode()
+
+        def binary(max_in_memory):
+            payload = read_payload(io.BytesIO(body), len(body), max_in_memory=max_in_memory)
+            assert payload.parameters['data'].nbytes == size
+            payload.close()
+
+        def json_base64():
+            parsed = json.loads(json_body)
+            assert len(base64.b64decode(parsed['parameters']['data'])) == size
+
+        in_memory = _throughput(lambda: binary(len(body)), size)
+        spooled = _throughput(lambda: binary(0), size)
+        baseline = _throughput(json_base64, size)
+        print(f'{_label(size):>8} {in_memory:>12.0f} {spooled:>14.0f} {baseline:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Micro-benchmark: cuerpo compilado una vez vs. parseado en cada llamada.
+
+Uso (desde backend/):
+    python benchmarks/bench_expressions.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.expressions import compile_body  # noqa: E402
+
+
+CASES = [
+    ('aritmética', 'a * b + (a - b) / 2', ['a', 'b'], {'a': 7, 'b': 3}),
+    ('strings', 'nombre + " tiene " + str(len(nombre)) + " letras"', ['nombre'], {'nombre': 'Valeria'}),
+    ('booleana', 'activo and (edad >= 18 or invitado) and not bloqueado',
+     ['activo', 'edad', 'invitado', 'bloqueado'],
+     {'activo': True, 'edad': 21, 'invitado': False, 'bloqueado': False}),
+]
+
+
+def main(number=100000):
+    print(f'{"caso":<12} {"compilado":>14} {"interpretado":>14} {"speedup":>9}')
+    for label, body, names, args in CASES:
+        compiled = compile_body(body, names)
+
+        t_compiled = timeit.timeit(lambda: compiled(args), number=number)
+        t_interpreted = timeit.timeit(lambda: compile_body(body, names)(args), number=number // 10) * 10
+
+        per_compiled = t_compiled / number * 1e9
+        per_interpreted = t_interpreted / number * 1e9
+        print(f'{label:<12} {per_compiled:>11.0f} ns {per_interpreted:>11.0f} ns '
+              f'{per_interpreted / per_compiled:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Punto de entrada de producción: varios procesos worker sobre el mismo puerto.
+
+Cada worker es un servidor eventlet que abre el puerto con SO_REUSEPORT, de modo que
+el kernel reparte las conexiones entre ellos (solo Linux). El registro de procedimientos
+se comparte mediante el log persistente de FileRegistry y los logs de Socket.IO se reenvían a
+todos los clientes a través de una cola de mensajes; si no se indica una, se arranca un
+broker ZeroMQ local en el mismo host. Las ejecuciones en curso y el historial de logs se
+guardan en un directorio temporal común, así la cancelación, /api/logs y la repetición de
+logs al conectar funcionan desde cualquier worker.
+
+Como no hay sesiones "sticky", los clientes deben conectarse con transporte websocket.
+
+Uso:
+    python serve.py --workers 4 --port 8080
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+
+DEFAULT_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'registry')
+
+
+def run_broker(pull_port, pub_port):
+    """Broker local: reenvía lo que publica cualquier worker a todos los workers"""
+    import zmq
+
+    context = zmq.Context()
+    pull = context.socket(zmq.PULL)
+    pull.bind(f'tcp://127.0.0.1:{pull_port}')
+    pub = context.socket(zmq.PUB)
+    pub.bind(f'tcp://127.0.0.1:{pub_port}')
+    try:
+        zmq.proxy(pull, pub)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_worker(host, port):
+    """Worker eventlet que comparte el puerto con los demás procesos"""
+    import eventlet
+    eventlet.monkey_patch()
+    import eventlet.wsgi
+
+    # Importar la app después del monkey patch y con el entorno ya configurado
+    from app import app
+
+    sock = eventlet.listen((host, port), reuse_port=True)
+    print(f'Worker {os.getpid()} escuchando en {host}:{port}')
+    eventlet.wsgi.server(sock, app, log_output=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor multi-proceso de sistema-remoto')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--registry', default=os.environ.get('REGISTRY_PATH', DEFAULT_REGISTRY),
+                        help='Archivo del registro de procedimientos compartido')
+    parser.add_argument('--message-queue', default=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+                        help='URL de la cola de Socket.IO (redis://..., zmq+tcp://...). '
+                             'Si se omite se arranca un broker ZeroMQ local')
+    parser.add_argument('--broker-ports', default='5555+5556',
+                        help='Puertos PULL+PUB del broker local')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork') or sys.platform == 'win32':
+        parser.error('El modo multi-proceso requiere SO_REUSEPORT (Linux); usa "python app.py"')
+
+    processes = []
+
+    message_queue = args.message_queue
+    if not message_queue:
+        pull_port, pub_port = (int(p) for p in args.broker_ports.split('+'))
+        broker = multiprocessing.Process(target=run_broker, args=(pull_port, pub_port), daemon=True)
+        broker.start()
+        processes.append(broker)
+        message_queue = f'zmq+tcp://127.0.0.1:{pull_port}+{pub_port}'
+
+    os.environ['SOCKETIO_MESSAGE_QUEUE'] = message_queue
+    os.environ['REGISTRY_PATH'] = args.registry
+    os.environ['SERVE_WORKERS'] = str(max(args.workers, 1))
+    # Estado compartido de esta ejecución de serve.py: ejecuciones en curso (ids repetidos y
+    # cancelación entre procesos) e historial de logs con una secuencia común a todos los workers
+    run_dir = tempfile.mkdtemp(prefix='sistema-remoto-')
+    os.environ['EXECUTIONS_DIR'] = os.path.join(run_dir, 'executions')
+    os.environ['LOG_BUFFER_PATH'] = os.path.join(run_dir, 'logs.jsonl')
+
+    for _ in range(max(args.workers, 1)):
+        worker = multiprocessing.Process(target=run_worker, args=(args.host, args.port))
+        worker.start()
+        processes.append(worker)
+
+    print(f'{args.workers} workers en {args.host}:{args.port} (cola: {message_queue}, registro: {args.registry})')
+
+    def shutdown(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        shutil.rmtree(run_dir, ignore_errors=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Si un worker muere, detener todo para que el supervisor (systemd, docker) reinicie
+    while all(p.is_alive() for p in processes):
+        time.sleep(1)
+    shutdown(None, None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+import os
+import re
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """La ejecución superó su tiempo límite"""
+
+
+class ExecutionCancelled(Exception):
+    """La ejecución fue cancelada por el cliente"""
+
+
+class AdmissionRejected(Exception):
+    """No hay capacidad para aceptar la ejecución; incluye una pista de reintento"""
+
+    def __init__(self, message, status, retry_after_ms):
+        super().__init__(message)
+        self.status = status
+        self.retry_after_ms = retry_after_ms
+
+
+class DuplicateExecution(Exception):
+    """Ya hay una ejecución en curso con el mismo id"""
+
+
+# Ids de ejecución aceptados (también se usan como nombre de archivo en SharedExecutions)
+EXECUTION_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Cada cuánto una ejecución revisa si otro proceso pidió cancelarla (segundos)
+CANCEL_POLL_INTERVAL = 0.05
+
+
+def parse_timeout_ms(value, field='timeoutMs'):
+    """Validar un tiempo límite en ms: entero positivo (None si no se indicó)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'{field} debe ser un entero positivo')
+    try:
+        timeout_ms = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} debe ser un entero positivo')
+    if timeout_ms <= 0 or timeout_ms != float(value):
+        raise ValueError(f'{field} debe ser un entero positivo')
+    return timeout_ms
+
+
+class Deadline:
+    """Tiempo límite y señal de cancelación de una ejecución.
+
+    ``cancel_check`` es una función opcional que indica si la cancelación se pidió desde
+    otro proceso; se consulta en cada etapa y cada CANCEL_POLL_INTERVAL durante las esperas.
+    """
+
+    def __init__(self, timeout_ms=None, cancel_check=None):
+        self.start = time.monotonic()
+        self.expires_at = None
+        self.cancel_check = cancel_check
+        self._cancelled = threading.Event()
+        if timeout_ms is not None:
+            self.tighten(timeout_ms)
+
+    def tighten(self, timeout_ms):
+        """Aplicar un límite (ms desde el inicio) si es más estricto que el actual"""
+        expires_at = self.start + timeout_ms / 1000.0
+        if self.expires_at is None or expires_at < self.expires_at:
+            self.expires_at = expires_at
+
+    def remaining(self):
+        """Segundos restantes, o None si no hay límite"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _poll_cancel(self):
+        if self.cancel_check is not None and not self._cancelled.is_set() and self.cancel_check():
+            self._cancelled.set()
+
+    def check(self, stage):
+        """Punto de cancelación cooperativa entre etapas"""
+        self._poll_cancel()
+        if self._cancelled.is_set():
+            raise ExecutionCancelled(f'Ejecución cancelada durante {stage}')
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(f'Tiempo límite excedido durante {stage}')
+
+    def sleep(self, seconds, stage):
+        """Esperar como time.sleep, pero despertar al cancelar o al vencer el límite"""
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            seconds = remaining
+        if self.cancel_check is None:
+            self._cancelled.wait(seconds)
+        else:
+            end = time.monotonic() + seconds
+            while not self._cancelled.wait(min(CANCEL_POLL_INTERVAL, max(end - time.monotonic(), 0))):
+                self._poll_cancel()
+                if time.monotonic() >= end:
+                    break
+        self.check(stage)
+
+
+class SharedExecutions:
+    """Ejecuciones en curso visibles para todos los workers de serve.py.
+
+    Cada ejecución crea ``<directorio>/<id>.active`` de forma exclusiva (un id repetido
+    en cualquier worker se rechaza) y una cancelación pedida en otro worker deja
+    ``<id>.cancel``, que el dueño detecta con ``Deadline.cancel_check``.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, execution_id, suffix):
+        return os.path.join(self.directory, f'{execution_id}.{suffix}')
+
+    def register(self, execution_id):
+        """Reservar el id o lanzar DuplicateExecution"""
+        try:
+            fd = os.open(self._path(execution_id, 'active'), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise DuplicateExecution(f'Ya hay una ejecución en curso con id {execution_id}')
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        os.close(fd)
+        # Una cancelación que llegó tarde para una ejecución anterior con el mismo id
+        try:
+            os.unlink(self._path(execution_id, 'cancel'))
+        except FileNotFoundError:
+            pass
+
+    def unregister(self, execution_id):
+        for suffix in ('cancel', 'active'):
+            try:
+                os.unlink(self._path(execution_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def request_cancel(self, execution_id):
+        """Pedir la cancelación; False si no hay ninguna ejecución con ese id"""
+        if not os.path.exists(self._path(execution_id, 'active')):
+            return False
+        open(self._path(execution_id, 'cancel'), 'a').close()
+        return True
+
+    def cancel_requested(self, execution_id):
+        return os.path.exists(self._path(execution_id, 'cancel'))
+
+
+class AdmissionController:
+    """Limita las ejecuciones concurrentes con una cola acotada.
+
+    Si la cola está llena rechaza de inmediato (429); si la espera en cola supera
+    ``queue_timeout`` o el tiempo límite de la petición, rechaza con 503. Ambos rechazos
+    incluyen un tiempo de reintento estimado a partir de la duración media de ejecución.
+    """
+
+    def __init__(self, max_concurrent=None, max_queue=None, queue_timeout=None):
+        if max_concurrent is None:
+            max_concurrent = int(os.environ.get('MAX_CONCURRENT_EXECUTIONS', '8'))
+        if max_queue is None:
+            max_queue = int(os.environ.get('EXECUTION_QUEUE_SIZE', '32'))
+        if queue_timeout is None:
+            queue_timeout = float(os.environ.get('EXECUTION_QUEUE_TIMEOUT', '2.0'))
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._avg_service_time = 1.0
+
+    def _retry_after_ms(self):
+        batches = (self._waiting + self._active) / self.max_concurrent
+        return max(int(self._avg_service_time * batches * 1000), 100)
+
+    def acquire(self, deadline=None):
+        """Reservar un lugar de ejecución o lanzar AdmissionRejected"""
+        with self._cond:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+                return
+
+            if self._waiting >= self.max_queue:
+                raise AdmissionRejected('Demasiadas ejecuciones en curso', 429, self._retry_after_ms())
+
+            timeout = self.queue_timeout
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and remaining < timeout:
+                timeout = remaining
+            end = time.monotonic() + timeout
+
+            self._waiting += 1
+            try:
+                while self._active >= self.max_concurrent:
+                    left = end - time.monotonic()
+                    if left <= 0:
+                        raise AdmissionRejected('Servidor saturado, reintenta más tarde', 503,
+                                                self._retry_after_ms())
+                    self._cond.wait(left)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+
+    def release(self, service_time=None):
+        """Liberar el lugar y actualizar la duración media usada para las pistas de reintento"""
+        with self._cond:
+            self._active -= 1
+            if service_time is not None:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'active': self._active,
+                'waiting': self._waiting,
+                'maxConcurrent': self.max_concurrent,
+                'maxQueue': self.max_queue,
+                'avgServiceMs': int(self._avg_service_time * 1000)
+            }
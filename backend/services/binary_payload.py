@@ -0,0 +1,170 @@
+"""Cuerpos binarios con prefijo de longitud para /api/execute/binary.
+
+Formato del cuerpo::
+
+    [4 bytes big-endian: largo del header][header JSON][bloque 1][bloque 2]...
+
+El header es ``{"procedureName": ..., "parameters": {...}, "binary": [{"name": ..., "length": N}, ...],
+"timeoutMs": ...}``; los bloques binarios van en el mismo orden que ``binary``. Cada parámetro
+binario se entrega al procedimiento como un ``memoryview`` sobre el buffer recibido, sin copias
+intermedias. Si el cuerpo supera ``max_in_memory`` se vuelca a un archivo temporal y se mapea
+con mmap, así la memoria del proceso no crece con el tamaño del payload.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+
+HEADER_PREFIX = struct.Struct('>I')
+MAX_HEADER_SIZE = 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class PayloadError(ValueError):
+    """El cuerpo binario no respeta el formato o los límites"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_payload(procedure_name, parameters=None, binary=None, timeout_ms=None):
+    """Armar un cuerpo binario (lado cliente). ``binary`` es {nombre: bytes-like}"""
+    binary = binary or {}
+    header = {
+        'procedureName': procedure_name,
+        'parameters': parameters or {},
+        'binary': [{'name': name, 'length': memoryview(data).nbytes} for name, data in binary.items()]
+    }
+    if timeout_ms is not None:
+        header['timeoutMs'] = timeout_ms
+    header_bytes = json.dumps(header).encode('utf-8')
+    return b''.join([HEADER_PREFIX.pack(len(header_bytes)), header_bytes, *binary.values()])
+
+
+def _read_exact(stream, view):
+    """Llenar ``view`` desde el stream, usando readinto cuando está disponible"""
+    readinto = getattr(stream, 'readinto', None)
+    filled = 0
+    total = len(view)
+    while filled < total:
+        if readinto is not None:
+            n = readinto(view[filled:])
+        else:
+            chunk = stream.read(total - filled)
+            n = len(chunk)
+            view[filled:filled + n] = chunk
+        if not n:
+            raise PayloadError('El cuerpo terminó antes de lo indicado')
+        filled += n
+
+
+class BinaryPayload:
+    """Payload decodificado: header y parámetros (binarios como memoryview)"""
+
+    def __init__(self, header, parameters, views, buffer_view, mapped=None, spool=None):
+        self.header = header
+        self.parameters = parameters
+        self._views = views
+        self._buffer_view = buffer_view
+        self._mapped = mapped
+        self._spool = spool
+
+    @property
+    def spooled(self):
+        return self._spool is not None
+
+    def close(self):
+        """Liberar las vistas y, si se usó, el mmap y el archivo temporal"""
+        for view in self._views:
+            view.release()
+        self._buffer_view.release()
+        if self._mapped is not None:
+            try:
+                self._mapped.close()
+            except BufferError:
+                # Alguien conservó una vista (p. ej. el resultado); se libera al recolectarla
+                pass
+        if self._spool is not None:
+            self._spool.close()
+
+
+def check_content_length(content_length, max_payload=None):
+    """Validar el largo declarado antes de leer nada del stream"""
+    if max_payload is None:
+        max_payload = int(os.environ.get('BINARY_MAX_PAYLOAD', str(1024 * 1024 * 1024)))
+
+    if content_length > max_payload:
+        raise PayloadError(f'El cuerpo supera el máximo de {max_payload} bytes', 413)
+    if content_length < HEADER_PREFIX.size:
+        raise PayloadError('Cuerpo vacío')
+
+
+def read_payload(stream, content_length, max_in_memory=None, max_payload=None):
+    """Leer un cuerpo binario desde ``stream`` y devolver un BinaryPayload"""
+    if max_in_memory is None:
+        max_in_memory = int(os.environ.get('BINARY_MAX_IN_MEMORY', str(32 * 1024 * 1024)))
+
+    check_content_length(content_length, max_payload)
+
+    prefix = bytearray(HEADER_PREFIX.size)
+    _read_exact(stream, memoryview(prefix))
+    (header_size,) = HEADER_PREFIX.unpack(prefix)
+    if header_size > MAX_HEADER_SIZE or header_size > content_length - HEADER_PREFIX.size:
+        raise PayloadError('Largo de header inválido')
+
+    header_bytes = bytearray(header_size)
+    _read_exact(stream, memoryview(header_bytes))
+    try:
+        header = json.loads(header_bytes)
+    except ValueError:
+        raise PayloadError('El header no es JSON válido')
+    if not isinstance(header, dict):
+        raise PayloadError('El header debe ser un objeto JSON')
+    parameters = header.get('parameters') or {}
+    if not isinstance(parameters, dict):
+        raise PayloadError('"parameters" debe ser un objeto JSON')
+
+    blocks = header.get('binary') or []
+    data_size = content_length - HEADER_PREFIX.size - header_size
+    try:
+        lengths = [int(block['length']) for block in blocks]
+        names = [str(block['name']) for block in blocks]
+    except (KeyError, TypeError, ValueError):
+        raise PayloadError('Cada bloque binario necesita "name" y "length"')
+    if any(length < 0 for length in lengths) or sum(lengths) != data_size:
+        raise PayloadError('Los largos declarados no coinciden con el cuerpo')
+
+    mapped = None
+    spool = None
+    if data_size <= max_in_memory:
+        buffer = bytearray(data_size)
+        buffer_view = memoryview(buffer)
+        _read_exact(stream, buffer_view)
+    else:
+        # Volcar a disco por bloques y mapear: la memoria residente no depende del tamaño
+        spool = tempfile.TemporaryFile()
+        chunk = bytearray(min(CHUNK_SIZE, data_size))
+        chunk_view = memoryview(chunk)
+        remaining = data_size
+        while remaining:
+            piece = chunk_view[:min(remaining, len(chunk))]
+            _read_exact(stream, piece)
+            spool.write(piece)
+            remaining -= len(piece)
+        spool.flush()
+        mapped = mmap.mmap(spool.fileno(), data_size, access=mmap.ACCESS_READ)
+        buffer_view = memoryview(mapped)
+
+    parameters = dict(parameters)
+    views = []
+    offset = 0
+    for name, length in zip(names, lengths):
+        view = buffer_view[offset:offset + length]
+        views.append(view)
+        parameters[name] = view
+        offset += length
+
+    return BinaryPayload(header, parameters, views, buffer_view, mapped, spool)
@@ -23,6 +23,14 @@ class CodeGenerator:
         else:
             raise ValueError(f"Protocolo desconocido: {protocol}")
     
+    def restore(self, protocol, files):
+        """Reescribir archivos generados guardados en el registro si faltan en disco"""
+        for filename, content in files.items():
+            path = os.path.join(self.base_path, protocol, filename)
+            if not os.path.exists(path):
+                with open(path, 'w') as f:
+                    f.write(content)
+    
     # ==================== gRPC ====================
     def generate_grpc(self, procedures, transport):
         """Generar archivos .proto y Python para gRPC"""
@@ -1,5 +1,11 @@
-import time
 from datetime import datetime
+from services.admission import Deadline, parse_timeout_ms
+from services.tracer import Tracer
+from services.log_buffer import LogBuffer
+from services.expressions import compile_body
+from services.registry import check_key
+
+BYTE_TYPES = (bytes, bytearray, memoryview)
 
 class ProcedureExecutor:
     def __init__(self):
@@ -7,72 +13,161 @@ class ProcedureExecutor:
         self.protocol = None
         self.transport = None
         self.socketio = None
+        self.tracer = Tracer(sample_rate=0.0)
+        self.registry = None
+        self.log_buffer = LogBuffer()
+        # Cuerpos compilados por nombre: (definición, (función, [(parámetro, tipo)])). La entrada
+        # vale mientras la definición sea el mismo objeto; si otro worker la reemplaza en el
+        # registro, el registro guarda un objeto nuevo y se vuelve a compilar
+        self.compiled = {}
     
     def set_socketio(self, socketio):
         """Configurar la instancia de SocketIO para emitir logs"""
         self.socketio = socketio
     
+    def set_tracer(self, tracer):
+        """Configurar el tracer que mide las etapas de cada ejecución"""
+        self.tracer = tracer
+    
+    def set_log_buffer(self, log_buffer):
+        """Configurar el historial de logs que se puede consultar y reenviar"""
+        self.log_buffer = log_buffer
+    
+    def set_registry(self, registry):
+        """Compartir el registro de procedimientos con otros procesos worker"""
+        self.registry = registry
+        self.procedures = registry.procedures
+        self.sync_registry()
+    
+    def sync_registry(self):
+        """Recargar procedimientos registrados por otros procesos, si cambiaron"""
+        if self.registry is None:
+            return
+        if self.registry.load_if_changed():
+            self.protocol = self.registry.protocol
+            self.transport = self.registry.transport
+    
     def emit_log(self, log_type, message):
         """Emitir log en tiempo real via WebSocket"""
-        timestamp = datetime.now().strftime('%I:%M:%S %p')
-        log_data = {
-            'type': log_type,
-            'message': message,
-            'timestamp': timestamp
-        }
-        
-        if self.socketio:
-            self.socketio.emit('log', log_data)
-        
-        print(f"[{timestamp}] [{log_type}] {message}")
+        with self.tracer.span('executor.emit_log', {'type': log_type}):
+            timestamp = datetime.now().strftime('%I:%M:%S %p')
+            log_data = self.log_buffer.append(log_type, message, timestamp)
+            
+            if self.socketio:
+                self.socketio.emit('log', log_data)
+            
+            print(f"[{timestamp}] [{log_type}] {message}")
     
     def register(self, protocol, transport, procedures):
+        check_key('Protocolo', protocol)
+        for proc in procedures:
+            check_key('Nombre de procedimiento', proc.get('name'))
+            parse_timeout_ms(proc.get('timeoutMs'), f'timeoutMs de {proc["name"]}')
+        
+        # Compilar todos los cuerpos antes de modificar el registro: si uno es inválido no se registra nada
+        compiled = {proc['name']: self._compile(proc) for proc in procedures}
+        
         self.protocol = protocol
         self.transport = transport
         
         for proc in procedures:
             self.procedures[proc['name']] = proc
+            self.compiled[proc['name']] = (proc, compiled[proc['name']])
+        
+        if self.registry is not None:
+            self.registry.save(protocol, transport, procedures)
         
         self.emit_log('info', f'Registrados {len(procedures)} procedimientos')
         self.emit_log('info', f'Protocolo: {protocol}, Transporte: {transport.upper()}')
     
-    def execute(self, procedure_name, parameters):
+    def execute(self, procedure_name, parameters, deadline=None):
+        tracer = self.tracer
+        if deadline is None:
+            deadline = Deadline()
+        
+        with tracer.span('executor.sync_registry'):
+            self.sync_registry()
+        
         if procedure_name not in self.procedures:
             self.emit_log('error', f'Procedimiento "{procedure_name}" no encontrado')
             raise ValueError(f'Procedimiento "{procedure_name}" no encontrado')
         
         procedure = self.procedures[procedure_name]
         
+        # Límite por defecto del procedimiento; se aplica el más estricto con el del cliente
+        timeout_ms = parse_timeout_ms(procedure.get('timeoutMs'), f'timeoutMs de {procedure_name}')
+        if timeout_ms is not None:
+            deadline.tighten(timeout_ms)
+        deadline.check('inicio')
+        
         self.emit_log('info', f'→ Ejecutando: {procedure_name}()')
         self.emit_log('info', f'Serializando parámetros...')
         
-        time.sleep(0.2)  # Simular serialización
-        
-        params_str = ', '.join([f'{k}={v}' for k, v in parameters.items()])
+        with tracer.span('executor.serialize'):
+            deadline.sleep(0.2, 'serialización')  # Simular serialización
+            params_str = ', '.join([f'{k}={self._describe(v)}' for k, v in parameters.items()])
         self.emit_log('success', f'✓ Serialización completa: {{{params_str}}}')
         
         self.emit_log('info', f'Transmitiendo via {self.transport.upper()}...')
-        time.sleep(0.3)  # Simular transmisión
+        with tracer.span('executor.transmit'):
+            deadline.sleep(0.3, 'transmisión')  # Simular transmisión
         
         self.emit_log('success', f'✓ Paquete enviado')
         self.emit_log('info', f'Esperando respuesta del servidor...')
         
-        time.sleep(0.2)  # Simular espera
+        with tracer.span('executor.wait'):
+            deadline.sleep(0.2, 'espera')  # Simular espera
         
         # EJECUTAR LÓGICA REAL
-        result = self._execute_logic(procedure_name, parameters, procedure)
+        with tracer.span('executor.logic', {'procedure': procedure_name}):
+            result = self._execute_logic(procedure_name, parameters, procedure)
         
-        time.sleep(0.2)  # Simular procesamiento
+        with tracer.span('executor.process'):
+            deadline.sleep(0.2, 'procesamiento')  # Simular procesamiento
         
-        self.emit_log('success', f'✓ Respuesta recibida: {result}')
+        self.emit_log('success', f'✓ Respuesta recibida: {self._describe(result)}')
         self.emit_log('success', f'✓ Deserialización completa')
         self.emit_log('info', '---')
         
         return result
     
+    def _compile(self, procedure):
+        """Compilar el cuerpo (expresión) del procedimiento, si tiene uno"""
+        if not procedure.get('body'):
+            return None
+        in_params = [(p['name'], p['type']) for p in procedure.get('parameters', [])
+                     if p.get('direction', 'in') == 'in']
+        fn = compile_body(procedure['body'], [name for name, _ in in_params], procedure['name'])
+        return fn, in_params
+    
+    def _run_compiled(self, name, params, compiled):
+        fn, in_params = compiled
+        args = {}
+        for param_name, param_type in in_params:
+            if param_name not in params:
+                raise ValueError(f'Falta el parámetro "{param_name}"')
+            args[param_name] = self._cast_value(params[param_name], param_type)
+        
+        try:
+            return fn(args)
+        except ZeroDivisionError:
+            raise ValueError("División por cero")
+        except Exception as e:
+            raise ValueError(f'Error evaluando {name}: {e}')
+    
     def _execute_logic(self, name, params, procedure):
         """Ejecuta la lógica real del procedimiento"""
         
+        # Procedimientos con cuerpo propio: se compila una vez (al registrar o al primer uso)
+        entry = self.compiled.get(name)
+        if entry is not None and entry[0] is procedure:
+            compiled = entry[1]
+        else:
+            compiled = self._compile(procedure)
+            self.compiled[name] = (procedure, compiled)
+        if compiled is not None:
+            return self._run_compiled(name, params, compiled)
+        
         # Operaciones aritméticas comunes
         # Incluir alias en inglés corto 'sum' además de 'add' para compatibilidad
         if name in ['suma', 'sumar', 'add', 'sum']:
@@ -96,10 +191,16 @@ class ProcedureExecutor:
         
         # Operaciones con strings
         elif name in ['concatenar', 'concat']:
-            return ''.join([str(v) for v in params.values()])
+            values = list(params.values())
+            # Con algún parámetro byte[] el resultado son bytes (los strings se codifican en UTF-8)
+            if any(isinstance(v, BYTE_TYPES) for v in values):
+                return b''.join([v if isinstance(v, BYTE_TYPES) else str(v).encode('utf-8') for v in values])
+            return ''.join([str(v) for v in values])
         
         elif name in ['longitud', 'length']:
             first_param = list(params.values())[0]
+            if isinstance(first_param, BYTE_TYPES):
+                return memoryview(first_param).nbytes
             return len(str(first_param))
         
         # Operaciones lógicas
@@ -116,13 +217,23 @@ class ProcedureExecutor:
             except:
                 return f"Resultado de {name}"
     
+    @staticmethod
+    def _describe(value):
+        """Texto para los logs: los valores binarios se resumen por su tamaño"""
+        if isinstance(value, BYTE_TYPES):
+            return f'<{memoryview(value).nbytes} bytes>'
+        return f'{value}'
+    
     def _cast_value(self, value, target_type):
         """Convierte valores al tipo correcto"""
-        if target_type == 'int':
+        if target_type in ('int', 'long'):
             return int(float(value))
-        elif target_type == 'float':
+        elif target_type in ('float', 'double'):
             return float(value)
         elif target_type == 'boolean':
             return str(value).lower() in ['true', '1', 'yes']
+        elif target_type == 'byte[]' and isinstance(value, BYTE_TYPES):
+            # Parámetros binarios: se entregan como memoryview, sin copiar
+            return value if isinstance(value, memoryview) else memoryview(value)
         else:
             return str(value)
\ No newline at end of file
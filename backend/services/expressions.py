@@ -0,0 +1,165 @@
+import ast
+
+
+class ExpressionError(ValueError):
+    """El cuerpo del procedimiento no es una expresión permitida"""
+
+
+MAX_BODY_LENGTH = 1000
+# Límites de los valores que puede producir una expresión
+MAX_STRING_LENGTH = 100000
+MAX_INT_BITS = 4096
+MAX_INT_DIGITS = 100
+MAX_ROUND_DIGITS = 100
+
+# Nombres internos de la multiplicación y el módulo seguros: no son identificadores
+# válidos, así que ningún parámetro ni expresión puede taparlos o llamarlos directamente
+SAFE_MULT = '<mult>'
+SAFE_MOD = '<mod>'
+
+
+def _safe_mult(left, right):
+    """``left * right`` con el tamaño del resultado acotado (str * int, int * int)"""
+    if isinstance(left, int) and isinstance(right, str):
+        left, right = right, left
+    if isinstance(left, str) and isinstance(right, int):
+        if len(left) * max(right, 0) > MAX_STRING_LENGTH:
+            raise ExpressionError(f'El resultado supera {MAX_STRING_LENGTH} caracteres')
+    elif isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_INT_BITS:
+            raise ExpressionError(f'El resultado supera {MAX_INT_BITS} bits')
+    return left * right
+
+
+def _safe_mod(left, right):
+    """``left % right`` solo numérico: con un string sería formateo printf sin límite de ancho"""
+    if isinstance(left, str):
+        raise ExpressionError('No se permite formatear strings con %')
+    return left % right
+
+
+def _safe_int(value=0, *args):
+    """``int()`` sin convertir strings enormes (la conversión es cuadrática)"""
+    if isinstance(value, str) and len(value.strip()) > MAX_INT_DIGITS:
+        raise ExpressionError(f'int() admite hasta {MAX_INT_DIGITS} dígitos')
+    return int(value, *args)
+
+
+def _safe_round(value, ndigits=None):
+    """``round()`` con la cantidad de decimales acotada"""
+    if ndigits is not None and isinstance(ndigits, int) and abs(ndigits) > MAX_ROUND_DIGITS:
+        raise ExpressionError(f'round() admite hasta {MAX_ROUND_DIGITS} decimales')
+    return round(value, ndigits)
+
+
+# Funciones disponibles dentro de una expresión
+SAFE_FUNCTIONS = {
+    'abs': abs,
+    'len': len,
+    'min': min,
+    'max': max,
+    'round': _safe_round,
+    'str': str,
+    'int': _safe_int,
+    'float': float,
+    'bool': bool
+}
+
+# Nodos permitidos: aritmética, comparaciones, lógica booleana, condicional e índices de strings.
+# No se permiten atributos, lambdas, comprensiones ni potencias (evita cómputos desmedidos);
+# la multiplicación y el módulo se reemplazan por _safe_mult y _safe_mod, que acotan el resultado.
+ALLOWED_NODES = (
+    ast.Expression, ast.Load,
+    ast.Constant, ast.Name, ast.Call,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.UnaryOp, ast.UAdd, ast.USub, ast.Not,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.IfExp, ast.Subscript, ast.Slice
+)
+
+
+def validate_body(tree, param_names):
+    """Verificar con lista blanca que el AST solo use nodos, nombres y funciones permitidos"""
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ExpressionError(f'Operación no permitida: {type(node).__name__}')
+
+        if isinstance(node, ast.Name):
+            if node.id not in param_names and node.id not in SAFE_FUNCTIONS:
+                raise ExpressionError(f'Nombre desconocido: {node.id}')
+
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SAFE_FUNCTIONS:
+                raise ExpressionError('Solo se pueden llamar funciones permitidas')
+            if node.keywords:
+                raise ExpressionError('No se permiten argumentos por nombre')
+
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool)) and node.value is not None:
+                raise ExpressionError(f'Constante no permitida: {node.value!r}')
+
+
+class _GuardOps(ast.NodeTransformer):
+    """Reemplazar ``a * b`` y ``a % b`` por llamadas a sus versiones seguras"""
+
+    GUARDED = {ast.Mult: SAFE_MULT, ast.Mod: SAFE_MOD}
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        guard = self.GUARDED.get(type(node.op))
+        if guard is None:
+            return node
+        call = ast.Call(func=ast.Name(id=guard, ctx=ast.Load()),
+                        args=[node.left, node.right], keywords=[])
+        return ast.copy_location(call, node)
+
+
+def _check_constants(node, param_names, env):
+    """Evaluar al registrar las subexpresiones sin parámetros para rechazar resultados enormes"""
+    if not any(isinstance(child, ast.Name) and child.id in param_names for child in ast.walk(node)):
+        if isinstance(node, ast.Constant):
+            return
+        expression = ast.fix_missing_locations(ast.Expression(body=node))
+        try:
+            eval(compile(expression, '<constante>', 'eval'), env)
+        except ExpressionError:
+            raise
+        except (ArithmeticError, LookupError, TypeError, ValueError):
+            # Otros errores (p. ej. división por cero) se informan al ejecutar
+            pass
+        return
+    for child in ast.iter_child_nodes(node):
+        _check_constants(child, param_names, env)
+
+
+def compile_body(body, param_names, name='procedimiento'):
+    """Parsear, validar y compilar una expresión una sola vez.
+
+    Devuelve una función ``fn(args)`` que evalúa el código ya compilado con el
+    diccionario de argumentos, sin volver a parsear.
+    """
+    if not isinstance(body, str) or not body.strip():
+        raise ExpressionError('El cuerpo debe ser una expresión no vacía')
+    if len(body) > MAX_BODY_LENGTH:
+        raise ExpressionError(f'El cuerpo supera {MAX_BODY_LENGTH} caracteres')
+
+    try:
+        tree = ast.parse(body.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f'Expresión inválida: {e.msg}')
+
+    param_names = set(param_names)
+    for param in param_names:
+        if not isinstance(param, str) or not param.isidentifier():
+            raise ExpressionError(f'Nombre de parámetro inválido: {param!r}')
+    validate_body(tree, param_names)
+    tree = ast.fix_missing_locations(_GuardOps().visit(tree))
+    env = {'__builtins__': {}, **SAFE_FUNCTIONS, SAFE_MULT: _safe_mult, SAFE_MOD: _safe_mod}
+    _check_constants(tree.body, param_names, env)
+    code = compile(tree, f'<{name}>', 'eval')
+
+    def evaluate(args):
+        return eval(code, env, args)
+
+    return evaluate
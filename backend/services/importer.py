@@ -0,0 +1,421 @@
+import io
+import re
+
+
+class ParseError(ValueError):
+    """El archivo no se pudo interpretar como definición de procedimientos"""
+
+
+# Un token: identificador (con puntos, p. ej. google.protobuf.Empty), número, string o símbolo.
+# "//" y "/*" también se reconocen aquí para no confundirlos con el contenido de un string.
+TOKEN_RE = re.compile(r'//|/\*|[A-Za-z_][\w.]*|\d+|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{}()\[\]<>;,=@:]')
+
+PROTO_TYPES = {
+    'int32': 'int', 'sint32': 'int', 'uint32': 'int', 'fixed32': 'int', 'sfixed32': 'int',
+    'int64': 'long', 'sint64': 'long', 'uint64': 'long', 'fixed64': 'long', 'sfixed64': 'long',
+    'float': 'float',
+    'double': 'double',
+    'bool': 'boolean',
+    'string': 'string',
+    'bytes': 'byte[]'
+}
+
+JAVA_TYPES = {
+    'String': 'string', 'int': 'int', 'Integer': 'int', 'long': 'long', 'Long': 'long',
+    'float': 'float', 'Float': 'float', 'double': 'double', 'Double': 'double',
+    'boolean': 'boolean', 'Boolean': 'boolean', 'byte[]': 'byte[]', 'void': 'void'
+}
+
+CSHARP_TYPES = {
+    'string': 'string', 'String': 'string', 'int': 'int', 'Int32': 'int', 'long': 'long', 'Int64': 'long',
+    'float': 'float', 'Single': 'float', 'double': 'double', 'Double': 'double',
+    'bool': 'boolean', 'Boolean': 'boolean', 'byte[]': 'byte[]', 'void': 'void'
+}
+
+MODIFIERS = {'public', 'private', 'protected', 'internal', 'abstract', 'static', 'default',
+             'final', 'synchronized', 'virtual', 'new', 'async', 'unsafe'}
+
+FORMATS = {
+    '.proto': 'proto',
+    '.java': 'java',
+    '.cs': 'csharp'
+}
+
+# Protocolo sugerido para cada formato importado
+DEFAULT_PROTOCOLS = {
+    'proto': 'grpc',
+    'java': 'rmi',
+    'csharp': 'netremoting'
+}
+
+
+def detect_format(filename):
+    """Formato del archivo según su extensión, o None"""
+    for extension, fmt in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    return None
+
+
+def tokenize(lines):
+    """Generar tokens línea por línea, descartando comentarios // y /* */.
+
+    Solo mantiene en memoria la línea actual, así que archivos grandes se procesan
+    en tiempo lineal sin cargarlos completos.
+    """
+    in_comment = False
+    for line in lines:
+        pos = 0
+        while True:
+            if in_comment:
+                end = line.find('*/', pos)
+                if end == -1:
+                    break
+                in_comment = False
+                pos = end + 2
+
+            match = TOKEN_RE.search(line, pos)
+            if match is None:
+                break
+            token = match.group()
+            pos = match.end()
+            if token == '//':
+                break
+            if token == '/*':
+                in_comment = True
+                continue
+            yield token
+
+
+class _Tokens:
+    """Iterador de tokens con un token de anticipación"""
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._peeked = None
+
+    def next(self):
+        if self._peeked is not None:
+            token, self._peeked = self._peeked, None
+            return token
+        return next(self._tokens, None)
+
+    def peek(self):
+        if self._peeked is None:
+            self._peeked = next(self._tokens, None)
+        return self._peeked
+
+    def expect(self, expected):
+        token = self.next()
+        if token != expected:
+            raise ParseError(f'Se esperaba "{expected}" y se encontró "{token}"')
+        return token
+
+    def skip_statement(self):
+        """Saltar hasta el próximo ';' (o bloque { } completo)"""
+        while True:
+            token = self.next()
+            if token is None or token == ';':
+                return
+            if token == '{':
+                self.skip_block()
+                return
+
+    def skip_block(self):
+        """Saltar un bloque cuyo '{' ya se consumió"""
+        depth = 1
+        while depth:
+            token = self.next()
+            if token is None:
+                raise ParseError('Bloque sin cerrar')
+            if token == '{':
+                depth += 1
+            elif token == '}':
+                depth -= 1
+
+
+def _decapitalize(name):
+    return name[0].lower() + name[1:] if name else name
+
+
+# ==================== .proto ====================
+def parse_proto(lines):
+    """Convertir un archivo .proto en procedimientos (uno por rpc)"""
+    tokens = _Tokens(tokenize(lines))
+    messages = {}
+    rpcs = []
+
+    while True:
+        token = tokens.next()
+        if token is None:
+            break
+        if token == 'message':
+            _parse_proto_message(tokens, tokens.next(), messages)
+        elif token == 'service':
+            tokens.next()
+            tokens.expect('{')
+            _parse_proto_service(tokens, rpcs)
+        elif token in ('enum', 'extend'):
+            tokens.next()
+            tokens.expect('{')
+            tokens.skip_block()
+        elif token != ';':
+            tokens.skip_statement()
+
+    procedures = []
+    for name, request_type, response_type in rpcs:
+        request_fields = messages.get(request_type.rsplit('.', 1)[-1], [])
+        response_fields = messages.get(response_type.rsplit('.', 1)[-1], [])
+
+        parameters = [{'name': field, 'type': field_type, 'direction': 'in'}
+                      for field, field_type in request_fields]
+        return_type = 'void'
+        for field, field_type in response_fields:
+            if field == 'result':
+                return_type = field_type
+            else:
+                parameters.append({'name': field, 'type': field_type, 'direction': 'out'})
+
+        procedures.append({
+            'name': _decapitalize(name),
+            'description': f'Importado de rpc {name}',
+            'returnType': return_type,
+            'parameters': parameters
+        })
+    return procedures
+
+
+def _parse_proto_message(tokens, name, messages):
+    tokens.expect('{')
+    fields = []
+    _parse_proto_fields(tokens, fields, messages)
+    messages[name] = fields
+
+
+def _parse_proto_fields(tokens, fields, messages):
+    """Leer campos hasta el '}' que cierra el mensaje (o el oneof)"""
+    while True:
+        token = tokens.peek()
+        if token is None:
+            raise ParseError('Mensaje sin cerrar')
+        if token == '}':
+            tokens.next()
+            return
+        if token == ';':
+            tokens.next()
+            continue
+        if token == 'message':
+            tokens.next()
+            _parse_proto_message(tokens, tokens.next(), messages)
+            continue
+        if token == 'enum':
+            tokens.next()
+            tokens.next()
+            tokens.expect('{')
+            tokens.skip_block()
+            continue
+        if token == 'oneof':
+            tokens.next()
+            tokens.next()
+            tokens.expect('{')
+            _parse_proto_fields(tokens, fields, messages)
+            continue
+        if token in ('option', 'reserved', 'extensions'):
+            tokens.skip_statement()
+            continue
+
+        # Campo: [label] tipo nombre = número [opciones];
+        statement = []
+        while True:
+            token = tokens.next()
+            if token is None or token == ';':
+                break
+            statement.append(token)
+        if '=' not in statement:
+            continue
+        field_name = statement[statement.index('=') - 1]
+        field_type = statement[0]
+        if field_type in ('repeated', 'optional', 'required') and len(statement) > 1:
+            field_type = statement[1]
+        fields.append((field_name, PROTO_TYPES.get(field_type, 'string')))
+
+
+def _parse_proto_service(tokens, rpcs):
+    while True:
+        token = tokens.next()
+        if token is None:
+            raise ParseError('Servicio sin cerrar')
+        if token == '}':
+            return
+        if token != 'rpc':
+            if token != ';':
+                tokens.skip_statement()
+            continue
+
+        name = tokens.next()
+        tokens.expect('(')
+        request_type = tokens.next()
+        if request_type == 'stream':
+            request_type = tokens.next()
+        tokens.expect(')')
+        tokens.expect('returns')
+        tokens.expect('(')
+        response_type = tokens.next()
+        if response_type == 'stream':
+            response_type = tokens.next()
+        tokens.expect(')')
+
+        if tokens.next() == '{':
+            tokens.skip_block()
+        rpcs.append((name, request_type, response_type))
+
+
+# ==================== Java RMI / C# ====================
+def parse_interface(lines, language):
+    """Convertir interfaces Java (RMI) o C# en procedimientos (uno por método)"""
+    type_map = JAVA_TYPES if language == 'java' else CSHARP_TYPES
+    tokens = _Tokens(tokenize(lines))
+    procedures = []
+
+    while True:
+        token = tokens.next()
+        if token is None:
+            break
+        if token != 'interface':
+            continue
+
+        # Saltar nombre, "extends Remote", genéricos, etc. hasta el cuerpo
+        while True:
+            token = tokens.next()
+            if token is None:
+                raise ParseError('Interfaz sin cuerpo')
+            if token == '{':
+                break
+        _parse_interface_body(tokens, type_map, language, procedures)
+
+    return procedures
+
+
+def _parse_interface_body(tokens, type_map, language, procedures):
+    member = []
+    while True:
+        token = tokens.next()
+        if token is None:
+            raise ParseError('Interfaz sin cerrar')
+        if token == '}':
+            return
+        if token == '{':
+            # Método con cuerpo por defecto, propiedad C# o tipo anidado
+            tokens.skip_block()
+            _add_method(member, type_map, language, procedures)
+            member = []
+        elif token == ';':
+            _add_method(member, type_map, language, procedures)
+            member = []
+        else:
+            member.append(token)
+
+
+def _strip_annotations(tokens):
+    """Quitar anotaciones Java (@Nombre(...)) y atributos C# ([Nombre])"""
+    result = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '@':
+            i += 2
+            if i < len(tokens) and tokens[i] == '(':
+                depth = 0
+                while i < len(tokens):
+                    depth += tokens[i] == '('
+                    depth -= tokens[i] == ')'
+                    i += 1
+                    if depth == 0:
+                        break
+            continue
+        if token == '[' and not result:
+            depth = 0
+            while i < len(tokens):
+                depth += tokens[i] == '['
+                depth -= tokens[i] == ']'
+                i += 1
+                if depth == 0:
+                    break
+            continue
+        result.append(token)
+        i += 1
+    return result
+
+
+def _join_type(tokens, type_map):
+    type_name = ''.join(tokens)
+    return type_map.get(type_name, 'string')
+
+
+def _add_method(member, type_map, language, procedures):
+    member = _strip_annotations(member)
+    if '(' not in member:
+        return
+    open_paren = member.index('(')
+    signature = [t for t in member[:open_paren] if t not in MODIFIERS]
+    if len(signature) < 2:
+        return
+    name = signature[-1]
+    return_type = _join_type(signature[:-1], type_map)
+
+    close_paren = len(member) - 1 - member[::-1].index(')')
+    parameters = []
+    for param_tokens in _split_params(member[open_paren + 1:close_paren]):
+        direction = 'in'
+        while param_tokens and param_tokens[0] in ('final', 'ref', 'out', 'in', 'params', 'this'):
+            if param_tokens[0] == 'out':
+                direction = 'out'
+            param_tokens = param_tokens[1:]
+        if len(param_tokens) < 2:
+            continue
+        parameters.append({
+            'name': param_tokens[-1],
+            'type': _join_type(param_tokens[:-1], type_map),
+            'direction': direction
+        })
+
+    procedures.append({
+        'name': name if language == 'java' else _decapitalize(name),
+        'description': f'Importado de {name}',
+        'returnType': return_type,
+        'parameters': parameters
+    })
+
+
+def _split_params(tokens):
+    """Separar parámetros por ',' respetando genéricos como Map<K, V>"""
+    params = []
+    current = []
+    depth = 0
+    for token in tokens:
+        if token == '<':
+            depth += 1
+        elif token == '>':
+            depth -= 1
+        if token == ',' and depth == 0:
+            params.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        params.append(current)
+    return params
+
+
+def import_procedures(stream, fmt):
+    """Leer un archivo (texto o binario) en el formato indicado y devolver sus procedimientos"""
+    if isinstance(stream, (bytes, str)):
+        stream = io.BytesIO(stream) if isinstance(stream, bytes) else io.StringIO(stream)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+
+    if fmt == 'proto':
+        return parse_proto(stream)
+    if fmt in ('java', 'csharp'):
+        return parse_interface(stream, fmt)
+    raise ParseError(f'Formato desconocido: {fmt}')
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos (modo de un solo proceso)
+    fcntl = None
+
+
+class CursorMismatch(ValueError):
+    """El cursor (epoch, seq) pertenece a otro historial (p. ej. un arranque anterior)"""
+
+
+class LogBuffer:
+    """Historial acotado de logs con números de secuencia monótonos.
+
+    Guarda como máximo ``capacity`` registros (los más antiguos se descartan) y recorta
+    los mensajes largos, de modo que la memoria usada tiene un límite fijo.
+
+    Con ``path`` (o ``LOG_BUFFER_PATH``, que define serve.py) el historial se comparte
+    entre procesos: cada log se agrega a un archivo bajo un bloqueo que también asigna la
+    secuencia, así todos los workers numeran igual y cualquiera puede responder desde
+    cualquier cursor. Cada proceso lee las líneas nuevas del archivo antes de escribir o
+    consultar y las guarda en su buffer en memoria. Cuando el archivo supera dos veces
+    ``capacity`` registros se reescribe solo con los últimos ``capacity``.
+
+    ``epoch`` identifica el historial (cambia en cada arranque): un cursor solo vale
+    junto con su epoch.
+    """
+
+    def __init__(self, capacity=None, max_message_length=2000, path=None):
+        if capacity is None:
+            capacity = int(os.environ.get('LOG_BUFFER_SIZE', '5000'))
+        if path is None:
+            path = os.environ.get('LOG_BUFFER_PATH') or None
+        self.capacity = capacity
+        self.max_message_length = max_message_length
+        self.path = path
+        self._records = deque(maxlen=capacity)
+        self._next_seq = 1
+        self.epoch = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+
+        # Estado de lectura del archivo compartido
+        self._file_id = None
+        self._offset = 0
+        self._file_lines = 0
+        if path is not None:
+            create_log_file(path, self.epoch)
+            with self._lock, self._locked():
+                self._catch_up()
+
+    @contextmanager
+    def _locked(self):
+        """Bloqueo exclusivo entre procesos sobre el archivo compartido"""
+        with open(self.path + '.lock', 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Incorporar lo que otros procesos escribieron. Requiere ambos bloqueos"""
+        with open(self.path, 'rb') as f:
+            file_id = os.fstat(f.fileno()).st_ino
+            if file_id != self._file_id:
+                # Archivo nuevo o compactado: se recarga completo
+                self._file_id = file_id
+                self._offset = 0
+                self._file_lines = 0
+                self._records.clear()
+            f.seek(self._offset)
+            data = f.read()
+
+        # Una línea sin "\n" todavía se está escribiendo (o quedó cortada): se lee después
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        for line in data[:end].splitlines():
+            self._file_lines += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if 'seq' not in record:
+                self.epoch = record.get('epoch', self.epoch)
+                continue
+            self._records.append(record)
+            self._next_seq = record['seq'] + 1
+
+    def _compact(self):
+        """Reescribir el archivo con la cabecera y los últimos ``capacity`` registros"""
+        lines = [json.dumps({'epoch': self.epoch}) + '\n']
+        lines.extend(json.dumps(record, ensure_ascii=False) + '\n' for record in self._records)
+        data = ''.join(lines).encode('utf-8')
+
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self._file_id = os.stat(self.path).st_ino
+        self._offset = len(data)
+        self._file_lines = len(lines)
+
+    def append(self, log_type, message, timestamp):
+        """Agregar un log y devolver el registro con su número de secuencia"""
+        if len(message) > self.max_message_length:
+            message = message[:self.max_message_length] + '…'
+
+        with self._lock:
+            if self.path is None:
+                record = self._new_record(log_type, message, timestamp)
+                self._records.append(record)
+                return record
+
+            with self._locked():
+                self._catch_up()
+                record = self._new_record(log_type, message, timestamp)
+                line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+                with open(self.path, 'ab') as f:
+                    f.write(line)
+                self._records.append(record)
+                self._offset += len(line)
+                self._file_lines += 1
+                if self._file_lines > 2 * self.capacity:
+                    self._compact()
+        return record
+
+    def _new_record(self, log_type, message, timestamp):
+        record = {
+            'seq': self._next_seq,
+            'epoch': self.epoch,
+            'type': log_type,
+            'message': message,
+            'timestamp': timestamp,
+            'time': time.time()
+        }
+        self._next_seq += 1
+        return record
+
+    def _refresh(self):
+        """En modo compartido, leer los logs nuevos de los demás procesos"""
+        if self.path is not None:
+            with self._locked():
+                self._catch_up()
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            self._refresh()
+            return self._next_seq - 1
+
+    def query(self, since=0, limit=100, epoch=None):
+        """Logs con secuencia mayor que ``since``, en orden, como máximo ``limit``.
+
+        Si se indica ``epoch`` y no es la de este historial lanza CursorMismatch: la
+        secuencia de un arranque anterior no se puede comparar con la actual.
+        """
+        with self._lock:
+            self._refresh()
+            if epoch is not None and epoch != self.epoch:
+                raise CursorMismatch(f'El cursor es de la epoch {epoch}; el historial actual es {self.epoch}')
+
+            last_seq = self._next_seq - 1
+            if not self._records:
+                return {'logs': [], 'epoch': self.epoch, 'lastSeq': last_seq, 'gap': False}
+
+            first_seq = self._records[0]['seq']
+            start = max(since + 1 - first_seq, 0)
+            logs = list(islice(self._records, start, start + limit))
+
+        return {
+            'logs': logs,
+            'epoch': self.epoch,
+            'lastSeq': last_seq,
+            # True si el cliente perdió logs que ya salieron del buffer
+            'gap': since + 1 < first_seq
+        }
+
+
+def create_log_file(path, epoch=None):
+    """Crear el archivo compartido con su cabecera (epoch) si todavía no existe"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return
+    header = json.dumps({'epoch': epoch or uuid.uuid4().hex[:12]}) + '\n'
+    os.write(fd, header.encode('utf-8'))
+    os.close(fd)
@@ -0,0 +1,333 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+
+class ProfilerError(ValueError):
+    """Parámetros inválidos o sesión de perfilado ya activa"""
+
+
+MAX_SECONDS = 60
+MAX_REQUESTS = 1000
+MIN_INTERVAL_MS = 1
+MAX_STACKS = 5000
+MAX_DEPTH = 64
+
+
+def _eventlet_patched():
+    """True si eventlet reemplazó los hilos por greenlets (p. ej. bajo serve.py)"""
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher
+        return patcher.is_monkey_patched('thread')
+    return False
+
+
+def _original_threading():
+    """Módulo threading real aunque eventlet haya aplicado monkey patch (el muestreo necesita un hilo del SO)"""
+    if _eventlet_patched():
+        from eventlet import patcher
+        return patcher.original('threading')
+    return threading
+
+
+def _label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _pstats_label(key):
+    filename, line, name = key
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+class _NoopSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SECTION = _NoopSection()
+
+
+class _Section:
+    """Una llamada perfilada (execute o generate_all) dentro de la sesión activa"""
+    __slots__ = ('session', 'name', 'accepted', 'profile', 'key')
+
+    def __init__(self, session, name):
+        self.session = session
+        self.name = name
+        self.accepted = False
+        self.profile = None
+        self.key = None
+
+    def __enter__(self):
+        self.accepted, self.profile, self.key = self.session.enter(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.accepted:
+            self.session.exit(self.profile, self.key)
+        return False
+
+
+class ProfileSession:
+    """Sesión acotada por tiempo y número de llamadas; los resultados ocupan memoria limitada"""
+
+    def __init__(self, mode, seconds, max_requests, interval_ms):
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.interval = interval_ms / 1000.0
+        self.started_at = time.time()
+        self.expires_at = time.monotonic() + seconds
+        self.requests = 0
+        self.profiled = 0
+        self.sections = {}
+        self.stopped = False
+        self._in_flight = 0
+
+        self._lock = threading.Lock()
+        # cProfile es por hilo: se perfila una llamada a la vez para acotar el overhead
+        self._busy = threading.Lock()
+        self._stats = None
+        # Hilo del SO (o greenlet, con eventlet) -> [sección, llamadas dentro, hilo del SO]
+        self._active = {}
+        self._get_ident = _original_threading().get_ident
+        # Con eventlet varias greenlets comparten hilo: se muestrea la pila de cada greenlet
+        self._current_greenlet = None
+        if _eventlet_patched():
+            import greenlet
+            self._current_greenlet = greenlet.getcurrent
+        self.stacks = {}
+        self.dropped_samples = 0
+        self.samples = 0
+
+    @property
+    def active(self):
+        """Activa hasta vencer el tiempo o hasta que terminen las N llamadas aceptadas"""
+        if not self.stopped and (time.monotonic() >= self.expires_at or
+                                 (self.requests >= self.max_requests and not self._in_flight)):
+            self.stopped = True
+        return not self.stopped
+
+    def stop(self):
+        self.stopped = True
+
+    def enter(self, name):
+        with self._lock:
+            if not self.active or self.requests >= self.max_requests:
+                return False, None, None
+            self.requests += 1
+            self._in_flight += 1
+            self.sections[name] = self.sections.get(name, 0) + 1
+
+        if self.mode == 'sampling':
+            ident = self._get_ident()
+            key = self._current_greenlet() if self._current_greenlet is not None else ident
+            with self._lock:
+                entry = self._active.setdefault(key, [name, 0, ident])
+                entry[1] += 1
+            return True, None, key
+
+        if not self._busy.acquire(blocking=False):
+            return True, None, None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Otra herramienta de perfilado ya está activa en este hilo
+            self._busy.release()
+            return True, None, None
+        return True, profile, None
+
+    def exit(self, profile, key):
+        with self._lock:
+            self._in_flight -= 1
+
+        if key is not None:
+            with self._lock:
+                entry = self._active.get(key)
+                if entry is not None:
+                    entry[1] -= 1
+                    if entry[1] <= 0:
+                        del self._active[key]
+            return
+        if profile is None:
+            return
+
+        profile.disable()
+        try:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+                self.profiled += 1
+        finally:
+            self._busy.release()
+
+    def _frame_of(self, key, ident, frames):
+        """Frame actual de una sección: con eventlet, el de su greenlet aunque esté suspendida"""
+        if self._current_greenlet is None:
+            return frames.get(ident)
+        frame = key.gr_frame
+        if frame is None:
+            # La greenlet está corriendo: su pila es la del hilo, salvo que se haya suspendido
+            # entre ambas lecturas
+            frame = sys._current_frames().get(ident)
+            if key.gr_frame is not None:
+                frame = key.gr_frame
+        return frame
+
+    def sample_loop(self, sleep):
+        """Tomar muestras de pila de los hilos (o greenlets) que están dentro de una sección perfilada"""
+        while self.active:
+            sleep(self.interval)
+            frames = sys._current_frames() if self._current_greenlet is None else None
+            with self._lock:
+                targets = [(key, entry[0], entry[2]) for key, entry in self._active.items()]
+            for key, name, ident in targets:
+                frame = self._frame_of(key, ident, frames)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                key = ';'.join(reversed(stack))
+                with self._lock:
+                    self.samples += 1
+                    if key in self.stacks:
+                        self.stacks[key] += 1
+                    elif len(self.stacks) < MAX_STACKS:
+                        self.stacks[key] = 1
+                    else:
+                        self.dropped_samples += 1
+            del frames
+
+    def status(self):
+        active = self.active
+        return {
+            'active': active,
+            'mode': self.mode,
+            'startedAt': self.started_at,
+            'seconds': self.seconds,
+            'maxRequests': self.max_requests,
+            'requests': self.requests,
+            'profiled': self.profiled,
+            'sections': dict(self.sections),
+            'samples': self.samples,
+            'stacks': len(self.stacks),
+            'droppedSamples': self.dropped_samples
+        }
+
+    def collapsed(self):
+        """Pilas agregadas en formato "a;b;c cuenta" (flamegraph.pl, speedscope, inferno)"""
+        with self._lock:
+            if self.mode == 'sampling':
+                lines = [f'{stack} {count}' for stack, count in self.stacks.items()]
+            else:
+                lines = self._collapsed_from_cprofile()
+        return '\n'.join(sorted(lines)) + '\n'
+
+    def _collapsed_from_cprofile(self):
+        """cProfile solo conoce pares llamador→llamado: se emiten pilas de dos niveles en µs"""
+        if self._stats is None:
+            return []
+        lines = []
+        for key, (cc, nc, tt, ct, callers) in self._stats.stats.items():
+            label = _pstats_label(key)
+            if not callers:
+                if tt > 0:
+                    lines.append(f'{label} {int(tt * 1e6)}')
+                continue
+            for caller, caller_stats in callers.items():
+                caller_tt = caller_stats[2] if isinstance(caller_stats, tuple) else 0
+                if caller_tt > 0:
+                    lines.append(f'{_pstats_label(caller)};{label} {int(caller_tt * 1e6)}')
+        return lines
+
+    def pstats_text(self, sort='cumulative', limit=50):
+        with self._lock:
+            if self._stats is None:
+                return ''
+            stream = io.StringIO()
+            self._stats.stream = stream
+            self._stats.sort_stats(sort).print_stats(limit)
+            self._stats.stream = sys.stdout
+        return stream.getvalue()
+
+    def pstats_dump(self):
+        """Contenido de un archivo .prof (como pstats.Stats.dump_stats)"""
+        with self._lock:
+            if self._stats is None:
+                return b''
+            return marshal.dumps(self._stats.stats)
+
+
+class Profiler:
+    """Perfilador bajo demanda para los caminos de ejecución y generación de código"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.session = None
+
+    def start(self, mode=None, seconds=10, requests=100, interval_ms=10):
+        if mode is None:
+            mode = 'sampling' if _eventlet_patched() else 'cprofile'
+        if mode not in ('cprofile', 'sampling'):
+            raise ProfilerError('mode debe ser "cprofile" o "sampling"')
+        if mode == 'cprofile' and _eventlet_patched():
+            # cProfile mide el hilo del SO completo: con eventlet incluiría a todas las
+            # greenlets que corren mientras la llamada perfilada espera
+            raise ProfilerError('Con eventlet (serve.py) solo está disponible mode="sampling"')
+        try:
+            seconds = float(seconds)
+            requests = int(requests)
+            interval_ms = float(interval_ms)
+        except (TypeError, ValueError):
+            raise ProfilerError('seconds, requests e intervalMs deben ser números')
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ProfilerError(f'seconds debe estar entre 0 y {MAX_SECONDS}')
+        if not 0 < requests <= MAX_REQUESTS:
+            raise ProfilerError(f'requests debe estar entre 1 y {MAX_REQUESTS}')
+        interval_ms = max(interval_ms, MIN_INTERVAL_MS)
+
+        with self._lock:
+            if self.session is not None and self.session.active:
+                raise ProfilerError('Ya hay una sesión de perfilado activa')
+            session = ProfileSession(mode, seconds, requests, interval_ms)
+            self.session = session
+
+        if mode == 'sampling':
+            real_threading = _original_threading()
+            sleep = time.sleep
+            if real_threading is not threading:
+                from eventlet import patcher
+                sleep = patcher.original('time').sleep
+            sampler = real_threading.Thread(target=session.sample_loop, args=(sleep,),
+                                            name='profiler-sampler', daemon=True)
+            sampler.start()
+        return session
+
+    def stop(self):
+        session = self.session
+        if session is not None:
+            session.stop()
+        return session
+
+    def profile(self, section):
+        """Context manager para una llamada; no hace nada si no hay sesión activa"""
+        session = self.session
+        if session is None or session.stopped or not session.active:
+            return _NOOP_SECTION
+        return _Section(session, section)
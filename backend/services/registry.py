@@ -0,0 +1,235 @@
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos (modo de un solo proceso)
+    fcntl = None
+
+
+# Tipos de registro en el log y en el snapshot: una línea "<tipo>\t<clave>\t<json>"
+RECORD_META = 'M'
+RECORD_PROCEDURE = 'P'
+RECORD_ARTIFACTS = 'A'
+
+
+def check_key(kind, key):
+    """Los nombres van sin escapar en el log: no pueden contener tabuladores ni saltos de línea"""
+    if not isinstance(key, str) or not key or any(c in key for c in '\t\n\r'):
+        raise ValueError(f'{kind} inválido: {key!r}')
+
+
+class LazyProcedures(dict):
+    """Diccionario de procedimientos que guarda el JSON crudo y lo decodifica al primer acceso"""
+
+    def __getitem__(self, name):
+        value = dict.__getitem__(self, name)
+        if isinstance(value, str):
+            value = json.loads(value)
+            dict.__setitem__(self, name, value)
+        return value
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def raw(self, name):
+        """JSON del procedimiento sin decodificarlo si aún no se usó"""
+        value = dict.__getitem__(self, name)
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+
+class FileRegistry:
+    """Registro de procedimientos persistente y compartido entre procesos.
+
+    Cada registro se agrega a un log (``<path>.log``); cuando el log crece más que el
+    snapshot (``<path>.snapshot``) se compacta en un snapshot nuevo. Al arrancar solo se
+    indexan las líneas por nombre: el JSON de cada procedimiento se decodifica al usarlo.
+    """
+
+    def __init__(self, path, compact_min_bytes=1024 * 1024):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.log_path = path + '.log'
+        self.lock_path = path + '.lock'
+        self.compact_min_bytes = compact_min_bytes
+
+        self.protocol = None
+        self.transport = None
+        self.procedures = LazyProcedures()
+        self.artifacts = {}
+
+        self._snapshot_id = None
+        self._log_offset = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Bloqueo exclusivo entre procesos para leer-modificar-escribir"""
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stat_snapshot(self):
+        try:
+            st = os.stat(self.snapshot_path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _log_size(self):
+        try:
+            return os.stat(self.log_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _apply(self, data, source):
+        """Aplicar líneas de registro (snapshot o log) al estado en memoria.
+
+        Una línea que no se puede interpretar se informa y se descarta, así un registro
+        dañado no impide arrancar el servidor.
+        """
+        procedures = self.procedures
+        for number, line in enumerate(data.split('\n'), 1):
+            if not line:
+                continue
+            try:
+                kind, key, payload = line.split('\t', 2)
+                if kind == RECORD_PROCEDURE:
+                    dict.__setitem__(procedures, key, payload)
+                elif kind == RECORD_META:
+                    meta = json.loads(payload)
+                    self.protocol = meta['protocol']
+                    self.transport = meta['transport']
+                elif kind == RECORD_ARTIFACTS:
+                    self.artifacts[key] = json.loads(payload)
+                else:
+                    raise ValueError(f'tipo desconocido {kind!r}')
+            except (ValueError, KeyError, TypeError) as e:
+                print(f'[registro] {source}: se descarta la línea {number} inválida ({e})')
+
+    def _read_from(self, path, offset=0):
+        """Leer desde ``offset`` hasta el último salto de línea completo.
+
+        Devuelve el texto y el offset siguiente; una línea final sin "\n" (escritura
+        interrumpida) no se consume.
+        """
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return '', offset
+        end = data.rfind(b'\n') + 1
+        return data[:end].decode('utf-8', errors='replace'), offset + end
+
+    def _catch_up(self):
+        """Leer lo que otros procesos escribieron desde la última lectura. Requiere el bloqueo"""
+        snapshot_id = self._stat_snapshot()
+        if snapshot_id != self._snapshot_id or self._log_size() < self._log_offset:
+            # Hubo una compactación: recargar snapshot y log completos
+            self.protocol = None
+            self.transport = None
+            self.procedures.clear()
+            self.artifacts = {}
+            data, _ = self._read_from(self.snapshot_path)
+            self._apply(data, self.snapshot_path)
+            self._snapshot_id = snapshot_id
+            self._log_offset = 0
+
+        data, self._log_offset = self._read_from(self.log_path, self._log_offset)
+        self._apply(data, self.log_path)
+
+        # Con el bloqueo tomado nadie está escribiendo: lo que quede después del último
+        # "\n" es una línea cortada por una caída y se descarta antes del próximo append
+        if self._log_size() > self._log_offset:
+            print(f'[registro] {self.log_path}: se descarta una línea incompleta al final del log')
+            os.truncate(self.log_path, self._log_offset)
+
+    def _append(self, lines):
+        with open(self.log_path, 'ab') as f:
+            f.write(''.join(lines).encode('utf-8'))
+            self._log_offset = f.tell()
+
+    def load_if_changed(self):
+        """Actualizar el estado si el log o el snapshot cambiaron. Devuelve True si hubo cambios"""
+        snapshot_id = self._stat_snapshot()
+        if snapshot_id == self._snapshot_id and self._log_size() == self._log_offset:
+            return False
+
+        with self._locked():
+            self._catch_up()
+        return True
+
+    def save(self, protocol, transport, procedures):
+        """Agregar procedimientos al log del registro"""
+        check_key('Protocolo', protocol)
+        for proc in procedures:
+            check_key('Nombre de procedimiento', proc['name'])
+        meta = json.dumps({'protocol': protocol, 'transport': transport})
+        lines = [f'{RECORD_META}\t\t{meta}\n']
+        for proc in procedures:
+            lines.append(f'{RECORD_PROCEDURE}\t{proc["name"]}\t{json.dumps(proc, ensure_ascii=False)}\n')
+
+        with self._locked():
+            self._catch_up()
+            self._append(lines)
+            self.protocol = protocol
+            self.transport = transport
+            for proc in procedures:
+                dict.__setitem__(self.procedures, proc['name'], proc)
+            self._maybe_compact()
+
+    def save_artifacts(self, protocol, files):
+        """Guardar el código generado ({nombre de archivo: contenido}) de un protocolo"""
+        check_key('Protocolo', protocol)
+        payload = json.dumps(files, ensure_ascii=False)
+        with self._locked():
+            self._catch_up()
+            self._append([f'{RECORD_ARTIFACTS}\t{protocol}\t{payload}\n'])
+            self.artifacts[protocol] = files
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        snapshot_size = self._snapshot_id[2] if self._snapshot_id else 0
+        if self._log_offset > max(self.compact_min_bytes, snapshot_size):
+            self._compact()
+
+    def compact(self):
+        """Reescribir snapshot con el estado actual y vaciar el log"""
+        with self._locked():
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        lines = []
+        if self.protocol is not None:
+            meta = json.dumps({'protocol': self.protocol, 'transport': self.transport})
+            lines.append(f'{RECORD_META}\t\t{meta}\n')
+        for name in self.procedures:
+            lines.append(f'{RECORD_PROCEDURE}\t{name}\t{self.procedures.raw(name)}\n')
+        for protocol, files in self.artifacts.items():
+            lines.append(f'{RECORD_ARTIFACTS}\t{protocol}\t{json.dumps(files, ensure_ascii=False)}\n')
+
+        tmp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+        os.replace(tmp_path, self.snapshot_path)
+        open(self.log_path, 'w').close()
+
+        self._snapshot_id = self._stat_snapshot()
+        self._log_offset = 0
@@ -0,0 +1,148 @@
+import json
+import os
+import random
+import threading
+import uuid
+from collections import deque
+from time import perf_counter_ns
+
+
+class _NoopSpan:
+    """Span vacío que se devuelve cuando la petición actual no está muestreada"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Mide una etapa con perf_counter_ns y la agrega a la traza activa"""
+    __slots__ = ('trace', 'name', 'args', 'start')
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = perf_counter_ns() - self.start
+        args = self.args
+        if exc_type is not None:
+            args = dict(args, error=exc_type.__name__)
+        self.trace.events.append((self.name, self.start, duration, threading.get_ident(), args))
+        return False
+
+
+class Trace:
+    """Spans registrados durante una sola petición"""
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.events = []
+
+
+class Tracer:
+    """Trazas por petición con muestreo configurable, exportables en formato Chrome trace / Perfetto"""
+
+    def __init__(self, sample_rate=None, buffer_size=None):
+        if sample_rate is None:
+            sample_rate = float(os.environ.get('TRACE_SAMPLE_RATE', '0'))
+        if buffer_size is None:
+            buffer_size = int(os.environ.get('TRACE_BUFFER_SIZE', '10000'))
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self._events = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def set_sample_rate(self, sample_rate):
+        """Cambiar la tasa de muestreo (0.0 = apagado, 1.0 = todas las peticiones)"""
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+
+    def begin(self, request_id=None):
+        """Iniciar la traza de la petición actual si resulta muestreada"""
+        rate = self.sample_rate
+        if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+            self._local.trace = None
+            return None
+
+        trace = Trace(request_id or uuid.uuid4().hex)
+        self._local.trace = trace
+        return trace
+
+    def end(self):
+        """Cerrar la traza actual y moverla al buffer en memoria"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return None
+        self._local.trace = None
+
+        with self._lock:
+            for name, start, duration, tid, args in trace.events:
+                self._events.append((trace.request_id, name, start, duration, tid, args))
+        return trace
+
+    def current(self):
+        return getattr(self._local, 'trace', None)
+
+    def span(self, name, args=None):
+        """Context manager que mide una etapa; no hace nada si no hay traza activa"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return _NOOP_SPAN
+        return _Span(trace, name, args or {})
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._events)
+        return {
+            'sampleRate': self.sample_rate,
+            'bufferSize': self.buffer_size,
+            'bufferedEvents': buffered
+        }
+
+    def to_chrome_trace(self, clear=False):
+        """Convertir los spans del buffer al formato JSON de Chrome trace / Perfetto"""
+        with self._lock:
+            events = list(self._events)
+            if clear:
+                self._events.clear()
+
+        trace_events = []
+        for request_id, name, start, duration, tid, args in events:
+            event_args = dict(args)
+            event_args['request_id'] = request_id
+            trace_events.append({
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': start / 1000.0,
+                'dur': duration / 1000.0,
+                'pid': self._pid,
+                'tid': tid,
+                'args': event_args
+            })
+
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path, clear=False):
+        """Escribir el buffer a un archivo local en formato Chrome trace"""
+        data = self.to_chrome_trace(clear=clear)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return len(data['traceEvents'])
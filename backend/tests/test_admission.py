@@ -0,0 +1,148 @@
+"""Pruebas de tiempos límite, cancelación y control de admisión."""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.admission import (  # noqa: E402
+    AdmissionController, AdmissionRejected, Deadline, DeadlineExceeded, DuplicateExecution,
+    ExecutionCancelled, SharedExecutions, parse_timeout_ms
+)
+
+
+class ParseTimeoutTest(unittest.TestCase):
+
+    def test_valores_validos(self):
+        self.assertIsNone(parse_timeout_ms(None))
+        self.assertEqual(parse_timeout_ms(250), 250)
+        self.assertEqual(parse_timeout_ms('250'), 250)
+        self.assertEqual(parse_timeout_ms(250.0), 250)
+
+    def test_valores_invalidos(self):
+        for value in (0, -5, '0', 'abc', 1.5, True, [], {}):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_timeout_ms(value)
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_sin_limite(self):
+        deadline = Deadline()
+        self.assertIsNone(deadline.remaining())
+        deadline.check('inicio')
+
+    def test_tighten_aplica_el_mas_estricto(self):
+        deadline = Deadline(10000)
+        deadline.tighten(50)
+        self.assertLessEqual(deadline.remaining(), 0.05)
+        deadline.tighten(10000)
+        self.assertLessEqual(deadline.remaining(), 0.05)
+
+    def test_sleep_se_corta_al_vencer(self):
+        deadline = Deadline(30)
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            deadline.sleep(1.0, 'espera')
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_cancelar_despierta_el_sleep(self):
+        deadline = Deadline(10000)
+        threading.Timer(0.05, deadline.cancel).start()
+        start = time.monotonic()
+        with self.assertRaises(ExecutionCancelled):
+            deadline.sleep(2.0, 'espera')
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(deadline.cancelled)
+
+    def test_cancelacion_pedida_desde_otro_proceso(self):
+        requested = []
+        deadline = Deadline(10000, cancel_check=lambda: bool(requested))
+        threading.Timer(0.05, requested.append, args=(True,)).start()
+        start = time.monotonic()
+        with self.assertRaises(ExecutionCancelled):
+            deadline.sleep(2.0, 'espera')
+        self.assertLess(time.monotonic() - start, 1.0)
+
+
+class AdmissionControllerTest(unittest.TestCase):
+
+    def test_admite_hasta_el_maximo_y_libera(self):
+        admission = AdmissionController(max_concurrent=2, max_queue=0, queue_timeout=0.05)
+        admission.acquire()
+        admission.acquire()
+        self.assertEqual(admission.stats()['active'], 2)
+        with self.assertRaises(AdmissionRejected) as ctx:
+            admission.acquire()
+        self.assertEqual(ctx.exception.status, 429)
+        self.assertGreaterEqual(ctx.exception.retry_after_ms, 100)
+
+        admission.release(0.1)
+        admission.acquire()
+        admission.release()
+        admission.release()
+        self.assertEqual(admission.stats()['active'], 0)
+
+    def test_espera_en_cola_y_vence(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        admission.acquire()
+        start = time.monotonic()
+        with self.assertRaises(AdmissionRejected) as ctx:
+            admission.acquire()
+        self.assertEqual(ctx.exception.status, 503)
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        self.assertEqual(admission.stats()['waiting'], 0)
+
+    def test_la_cola_respeta_el_tiempo_limite(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5.0)
+        admission.acquire()
+        start = time.monotonic()
+        with self.assertRaises(AdmissionRejected):
+            admission.acquire(Deadline(50))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_entra_cuando_se_libera_un_lugar(self):
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=2.0)
+        admission.acquire()
+        threading.Timer(0.05, admission.release).start()
+        admission.acquire()
+        self.assertEqual(admission.stats()['active'], 1)
+        admission.release()
+
+
+class SharedExecutionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.first = SharedExecutions(self._tmp.name)
+        self.second = SharedExecutions(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_ids_repetidos_entre_workers(self):
+        self.first.register('abc')
+        with self.assertRaises(DuplicateExecution):
+            self.second.register('abc')
+        self.first.unregister('abc')
+        self.second.register('abc')
+
+    def test_cancelar_desde_otro_worker(self):
+        self.assertFalse(self.second.request_cancel('abc'))
+        self.first.register('abc')
+        self.assertFalse(self.first.cancel_requested('abc'))
+        self.assertTrue(self.second.request_cancel('abc'))
+        self.assertTrue(self.first.cancel_requested('abc'))
+
+        # Una cancelación vieja no afecta a la próxima ejecución con el mismo id
+        self.first.unregister('abc')
+        self.first.register('abc')
+        self.assertFalse(self.first.cancel_requested('abc'))
+
+
+if __name__ == '__main__':
+    unittest.main()
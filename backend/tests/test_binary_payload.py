@@ -0,0 +1,179 @@
+"""Pruebas de los cuerpos binarios con prefijo de longitud (/api/execute/binary)."""
+import io
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.binary_payload import (  # noqa: E402
+    HEADER_PREFIX, PayloadError, check_content_length, encode_payload, read_payload
+)
+from services.executor import ProcedureExecutor  # noqa: E402
+
+
+def _raw(header, data=b''):
+    """Cuerpo armado a mano, para headers que encode_payload no generaría"""
+    header_bytes = header if isinstance(header, bytes) else json.dumps(header).encode('utf-8')
+    return HEADER_PREFIX.pack(len(header_bytes)) + header_bytes + data
+
+
+def _read(body, **kwargs):
+    return read_payload(io.BytesIO(body), len(body), **kwargs)
+
+
+class ReadPayloadTest(unittest.TestCase):
+
+    def test_ida_y_vuelta(self):
+        body = encode_payload('concat', {'texto': 'hola'},
+                              {'a': b'\x00\x01\x02', 'b': memoryview(b'xyz'), 'vacio': b''}, timeout_ms=0)
+        payload = _read(body)
+        try:
+            self.assertFalse(payload.spooled)
+            self.assertEqual(payload.header['procedureName'], 'concat')
+            self.assertEqual(payload.header['timeoutMs'], 0)
+            self.assertEqual(payload.parameters['texto'], 'hola')
+            self.assertIsInstance(payload.parameters['a'], memoryview)
+            self.assertEqual(bytes(payload.parameters['a']), b'\x00\x01\x02')
+            self.assertEqual(bytes(payload.parameters['b']), b'xyz')
+            self.assertEqual(bytes(payload.parameters['vacio']), b'')
+        finally:
+            payload.close()
+
+    def test_stream_sin_readinto(self):
+        class Stream:
+            def __init__(self, data):
+                self._data = io.BytesIO(data)
+
+            def read(self, size):
+                # Entrega de a pocos bytes, como un socket lento
+                return self._data.read(min(size, 3))
+
+        body = encode_payload('length', binary={'datos': bytes(range(50))})
+        payload = read_payload(Stream(body), len(body))
+        try:
+            self.assertEqual(bytes(payload.parameters['datos']), bytes(range(50)))
+        finally:
+            payload.close()
+
+    def test_headers_malformados(self):
+        cases = {
+            'prefijo mayor que el cuerpo': HEADER_PREFIX.pack(100) + b'{}',
+            'json inválido': _raw(b'{"procedureName": '),
+            'header que no es objeto': _raw([1, 2]),
+            'parameters que no es objeto': _raw({'procedureName': 'x', 'parameters': 'abc'}),
+            'bloque sin length': _raw({'procedureName': 'x', 'binary': [{'name': 'a'}]}, b'1'),
+            'bloque sin name': _raw({'procedureName': 'x', 'binary': [{'length': 1}]}, b'1'),
+            'length negativo': _raw({'procedureName': 'x', 'binary': [{'name': 'a', 'length': -1}]}),
+            'sobran bytes': _raw({'procedureName': 'x', 'binary': [{'name': 'a', 'length': 1}]}, b'12'),
+            'faltan bytes': _raw({'procedureName': 'x', 'binary': [{'name': 'a', 'length': 3}]}, b'12'),
+        }
+        for label, body in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(PayloadError) as ctx:
+                    _read(body)
+                self.assertEqual(ctx.exception.status, 400)
+
+    def test_cuerpo_mas_corto_que_content_length(self):
+        body = encode_payload('length', binary={'datos': b'abcdef'})
+        with self.assertRaises(PayloadError):
+            read_payload(io.BytesIO(body[:-2]), len(body))
+
+    def test_limites_de_largo(self):
+        with self.assertRaises(PayloadError) as ctx:
+            check_content_length(101, max_payload=100)
+        self.assertEqual(ctx.exception.status, 413)
+        with self.assertRaises(PayloadError) as ctx:
+            check_content_length(HEADER_PREFIX.size - 1, max_payload=100)
+        self.assertEqual(ctx.exception.status, 400)
+        check_content_length(100, max_payload=100)
+
+    def test_cuerpo_grande_va_a_disco(self):
+        data = os.urandom(200 * 1024)
+        body = encode_payload('length', binary={'a': data[:1000], 'b': data[1000:]})
+        payload = _read(body, max_in_memory=1024)
+        self.assertTrue(payload.spooled)
+        self.assertEqual(bytes(payload.parameters['a']), data[:1000])
+        self.assertEqual(bytes(payload.parameters['b']), data[1000:])
+
+        # Una vista conservada por el resultado no impide cerrar el payload
+        kept = payload.parameters['b'][:10]
+        payload.close()
+        self.assertEqual(bytes(kept), data[1000:1010])
+        kept.release()
+
+
+class BinaryParametersTest(unittest.TestCase):
+    """Las operaciones de texto tratan los memoryview como bytes, no por su repr"""
+
+    def setUp(self):
+        self.executor = ProcedureExecutor()
+
+    def test_length(self):
+        result = self.executor._execute_logic('length', {'datos': memoryview(b'12345678')}, {})
+        self.assertEqual(result, 8)
+
+    def test_concat(self):
+        result = self.executor._execute_logic('concat', {'a': memoryview(b'ab'), 'b': 'ñ', 'c': b'!'}, {})
+        self.assertEqual(result, b'ab' + 'ñ'.encode('utf-8') + b'!')
+
+    def test_describe(self):
+        self.assertEqual(ProcedureExecutor._describe(memoryview(b'abc')), '<3 bytes>')
+
+
+class BinaryEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Sin registro persistente: las pruebas no escriben en backend/data
+        os.environ['REGISTRY_PATH'] = ''
+        import app
+        cls.app = app
+        cls.client = app.app.test_client()
+        app.executor.register('grpc', 'tcp', [
+            {'name': 'length', 'returnType': 'int', 'parameters': [{'name': 'datos', 'type': 'byte[]'}]}
+        ])
+
+    def _post(self, body, **headers):
+        return self.client.post('/api/execute/binary', data=body,
+                                headers=dict({'Content-Type': 'application/octet-stream'}, **headers))
+
+    def test_ejecuta_con_parametro_binario(self):
+        response = self._post(encode_payload('length', binary={'datos': b'\x00' * 100}))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['result'], 100)
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_header_malformado_libera_el_lugar(self):
+        response = self._post(_raw({'procedureName': 'length', 'parameters': 'abc'}), **{'X-Request-Id': 'mal-1'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.headers['X-Request-Id'], 'mal-1')
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_timeout_invalido_en_el_header(self):
+        response = self._post(encode_payload('length', binary={'datos': b'1'}, timeout_ms=-1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_error_al_leer_libera_el_lugar(self):
+        body = encode_payload('length', binary={'datos': b'abc'})
+        with mock.patch.object(self.app, 'read_payload', side_effect=OSError('conexión cortada')):
+            try:
+                response = self._post(body)
+            except OSError:
+                pass
+            else:
+                self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+    def test_cuerpo_demasiado_grande(self):
+        with mock.patch.dict(os.environ, {'BINARY_MAX_PAYLOAD': '16'}):
+            response = self._post(encode_payload('length', binary={'datos': b'x' * 64}))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.app.admission.stats()['active'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
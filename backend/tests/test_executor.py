@@ -0,0 +1,64 @@
+"""Pruebas de ProcedureExecutor sin servidor (sin Socket.IO ni esperas simuladas)."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.executor import ProcedureExecutor  # noqa: E402
+from services.registry import FileRegistry  # noqa: E402
+
+
+def _proc(name, body=None):
+    proc = {'name': name, 'returnType': 'int',
+            'parameters': [{'name': 'a', 'type': 'int', 'direction': 'in'}]}
+    if body is not None:
+        proc['body'] = body
+    return proc
+
+
+def _executor(registry=None):
+    executor = ProcedureExecutor()
+    executor.emit_log = lambda log_type, message: None
+    if registry is not None:
+        executor.set_registry(registry)
+    return executor
+
+
+class CompiledBodiesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'registry')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, executor, name, params):
+        executor.sync_registry()
+        return executor._execute_logic(name, params, executor.procedures[name])
+
+    def test_cuerpo_reemplazado_por_otro_worker(self):
+        first = _executor(FileRegistry(self.path))
+        second = _executor(FileRegistry(self.path))
+
+        first.register('grpc', 'tcp', [_proc('f', 'a + 1')])
+        self.assertEqual(self._run(first, 'f', {'a': 1}), 2)
+
+        second.register('grpc', 'tcp', [_proc('f', 'a + 100')])
+        # register() lee el log antes de escribir, así que load_if_changed ya no ve el cambio
+        first.register('grpc', 'tcp', [_proc('g', 'a + 2')])
+        self.assertEqual(first.procedures['f']['body'], 'a + 100')
+        self.assertEqual(self._run(first, 'f', {'a': 1}), 101)
+
+    def test_cuerpo_reemplazado_en_el_mismo_proceso(self):
+        executor = _executor()
+        executor.register('grpc', 'tcp', [_proc('f', 'a * 2')])
+        self.assertEqual(self._run(executor, 'f', {'a': 3}), 6)
+        executor.register('grpc', 'tcp', [_proc('f', 'a * 3')])
+        self.assertEqual(self._run(executor, 'f', {'a': 3}), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Pruebas del compilador de expresiones (cuerpos de procedimientos definidos por el usuario).
+
+Uso (desde backend/):
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.expressions import (  # noqa: E402
+    ExpressionError, MAX_STRING_LENGTH, compile_body
+)
+
+
+class CompileBodyTest(unittest.TestCase):
+
+    def test_aritmetica_y_strings(self):
+        self.assertEqual(compile_body('a * b + (a - b) / 2', ['a', 'b'])({'a': 7, 'b': 3}), 23.0)
+        self.assertEqual(compile_body('nombre * 2', ['nombre'])({'nombre': 'ab'}), 'abab')
+        self.assertEqual(compile_body('2 * nombre', ['nombre'])({'nombre': 'ab'}), 'abab')
+        self.assertEqual(compile_body('round(x, 2)', ['x'])({'x': 3.14159}), 3.14)
+        self.assertEqual(compile_body('int(s) + 1', ['s'])({'s': '41'}), 42)
+
+    def test_rechaza_nodos_y_nombres_no_permitidos(self):
+        for body in ('a ** 2', 'a.__class__', '__import__("os")', '[x for x in a]', 'lambda: 1', 'open("f")'):
+            with self.subTest(body=body):
+                with self.assertRaises(ExpressionError):
+                    compile_body(body, ['a'])
+
+    def test_el_nombre_interno_no_se_puede_tapar(self):
+        with self.assertRaises(ExpressionError):
+            compile_body('a * b', ['a', 'b', '<mult>'])
+
+    def test_multiplicacion_de_string_acotada_al_ejecutar(self):
+        fn = compile_body("'x' * a * a", ['a'])
+        self.assertEqual(fn({'a': 3}), 'x' * 9)
+        with self.assertRaises(ExpressionError):
+            fn({'a': 100000})
+
+        fn = compile_body('s * n', ['s', 'n'])
+        self.assertEqual(len(fn({'s': 'x', 'n': MAX_STRING_LENGTH})), MAX_STRING_LENGTH)
+        with self.assertRaises(ExpressionError):
+            fn({'s': 'x', 'n': MAX_STRING_LENGTH + 1})
+
+    def test_modulo_solo_numerico(self):
+        fn = compile_body('a % b', ['a', 'b'])
+        self.assertEqual(fn({'a': 7, 'b': 3}), 1)
+        self.assertEqual(fn({'a': 7.5, 'b': 2}), 1.5)
+        with self.assertRaises(ExpressionError):
+            compile_body('s % a', ['s', 'a'])({'s': '%0200000000d', 'a': 1})
+
+    def test_formateo_constante_se_rechaza_al_registrar(self):
+        with self.assertRaises(ExpressionError):
+            compile_body("'%0300000000d' % 1 + a", ['a'])
+
+    def test_multiplicacion_de_enteros_acotada(self):
+        fn = compile_body('a * a * a * a * a * a * a * a', ['a'])
+        self.assertEqual(fn({'a': 2}), 256)
+        with self.assertRaises(ExpressionError):
+            fn({'a': 2 ** 1000})
+
+    def test_constantes_enormes_se_rechazan_al_registrar(self):
+        for body in ("'x' * 99999 * 99999", "'x' * 99999 * 99999 + a", "int('9' * 4000)", 'round(a, 10000)'):
+            with self.subTest(body=body):
+                with self.assertRaises(ExpressionError):
+                    compile_body(body, ['a'])({'a': 1.5})
+
+    def test_int_y_round_acotados_al_ejecutar(self):
+        with self.assertRaises(ExpressionError):
+            compile_body('int(s)', ['s'])({'s': '9' * 4000})
+        with self.assertRaises(ExpressionError):
+            compile_body('round(x, n)', ['x', 'n'])({'x': 1.5, 'n': 10000})
+
+    def test_division_por_cero_constante_se_informa_al_ejecutar(self):
+        fn = compile_body('a + 1 / 0', ['a'])
+        with self.assertRaises(ZeroDivisionError):
+            fn({'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Pruebas del importador de .proto, interfaces Java RMI y C#."""
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services import importer  # noqa: E402
+from services.code_generator import CodeGenerator  # noqa: E402
+
+
+PROCEDURES = [
+    {'name': 'sumar', 'description': 'Suma dos números', 'returnType': 'int',
+     'parameters': [{'name': 'a', 'type': 'int', 'direction': 'in'},
+                    {'name': 'b', 'type': 'long', 'direction': 'in'}]},
+    {'name': 'saludo', 'description': 'Arma un saludo', 'returnType': 'string',
+     'parameters': [{'name': 'nombre', 'type': 'string', 'direction': 'in'},
+                    {'name': 'activo', 'type': 'boolean', 'direction': 'in'},
+                    {'name': 'datos', 'type': 'byte[]', 'direction': 'in'},
+                    {'name': 'peso', 'type': 'double', 'direction': 'in'}]},
+    {'name': 'ping', 'description': 'Sin parámetros', 'returnType': 'void', 'parameters': []}
+]
+
+
+def _signature(procedures):
+    return [(p['name'], p['returnType'], [(x['name'], x['type'], x['direction']) for x in p['parameters']])
+            for p in procedures]
+
+
+class RoundTripTest(unittest.TestCase):
+    """Lo que genera CodeGenerator se vuelve a importar sin perder información"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.generator = CodeGenerator()
+        self.generator.base_path = self._tmp.name
+        self.generator._ensure_directories()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _round_trip(self, protocol, filename):
+        generated = self.generator.generate_all(protocol, 'tcp', PROCEDURES)
+        fmt = importer.detect_format(filename)
+        with open(generated['files'][filename], 'rb') as f:
+            return importer.import_procedures(f, fmt)
+
+    def test_proto(self):
+        self.assertEqual(_signature(self._round_trip('grpc', 'service.proto')), _signature(PROCEDURES))
+
+    def test_java_rmi(self):
+        self.assertEqual(_signature(self._round_trip('rmi', 'RemoteProcedureService.java')),
+                         _signature(PROCEDURES))
+
+    def test_csharp(self):
+        self.assertEqual(_signature(self._round_trip('netremoting', 'IRemoteProcedureService.cs')),
+                         _signature(PROCEDURES))
+
+
+class ParserTest(unittest.TestCase):
+
+    def test_detect_format(self):
+        self.assertEqual(importer.detect_format('a/b/Servicio.PROTO'), 'proto')
+        self.assertEqual(importer.detect_format('Calc.java'), 'java')
+        self.assertEqual(importer.detect_format('ICalc.cs'), 'csharp')
+        self.assertIsNone(importer.detect_format('notas.txt'))
+
+    def test_comentarios_y_strings(self):
+        source = '''
+        // rpc Falso (A) returns (B);
+        /* service Oculto { rpc X (A) returns (B); } */
+        syntax = "proto3"; option java_package = "a // b";
+        message Req { repeated string nombres = 1; oneof o { int32 id = 2; } }
+        message Res { bool result = 1; bytes extra = 2; }
+        service S { rpc Buscar (Req) returns (stream Res) { option deprecated = true; } }
+        '''
+        procedures = importer.import_procedures(source, 'proto')
+        self.assertEqual(_signature(procedures), [
+            ('buscar', 'boolean', [('nombres', 'string', 'in'), ('id', 'int', 'in'),
+                                   ('extra', 'byte[]', 'out')])
+        ])
+
+    def test_interfaz_java_con_anotaciones_y_genericos(self):
+        source = b'''
+        public interface Calc extends java.rmi.Remote {
+            @Deprecated(since = "1")
+            Map<String, Integer> contar(final List<String> palabras, int minimo) throws RemoteException;
+            default void nada() { }
+        }
+        '''
+        procedures = importer.import_procedures(io.BytesIO(source), 'java')
+        self.assertEqual(_signature(procedures), [
+            ('contar', 'string', [('palabras', 'string', 'in'), ('minimo', 'int', 'in')]),
+            ('nada', 'void', [])
+        ])
+
+    def test_interfaz_csharp_con_out(self):
+        source = 'public interface ICalc { [Obsoleto] bool Dividir(int a, int b, out double resto); }'
+        self.assertEqual(_signature(importer.import_procedures(source, 'csharp')), [
+            ('dividir', 'boolean', [('a', 'int', 'in'), ('b', 'int', 'in'), ('resto', 'double', 'out')])
+        ])
+
+    def test_errores(self):
+        with self.assertRaises(importer.ParseError):
+            importer.import_procedures('message A { int32 a = 1;', 'proto')
+        with self.assertRaises(importer.ParseError):
+            importer.import_procedures('interface A { void f();', 'java')
+        with self.assertRaises(importer.ParseError):
+            importer.import_procedures('', 'yaml')
+
+
+class ImportEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Sin registro persistente: las pruebas no escriben en backend/data
+        os.environ['REGISTRY_PATH'] = ''
+        import app
+        cls._tmp = tempfile.TemporaryDirectory()
+        app.code_generator.base_path = cls._tmp.name
+        app.code_generator._ensure_directories()
+        cls.app = app
+        cls.client = app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def _post(self, query, files):
+        data = {'file': [(io.BytesIO(content), name) for name, content in files]}
+        return self.client.post('/api/procedures/import' + query, data=data)
+
+    def test_formatos_mezclados_sin_protocolo(self):
+        response = self._post('', [('a.proto', b'service S { rpc F (A) returns (B); }'),
+                                   ('b.java', b'interface C { int g(int a); }')])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('formatos distintos', response.get_json()['error'])
+
+    def test_formatos_mezclados_con_protocolo(self):
+        response = self._post('?protocol=grpc', [
+            ('a.proto', b'message A { int32 x = 1; } message B { int32 result = 1; }'
+                        b' service S { rpc Doble (A) returns (B); }'),
+            ('b.java', b'interface C { String eco(String texto); }')
+        ])
+        self.assertEqual(response.status_code, 200, response.get_json())
+        names = set(self.app.executor.procedures)
+        self.assertIn('doble', names)
+        self.assertIn('eco', names)
+
+    def test_formato_desconocido(self):
+        response = self._post('', [('notas.txt', b'hola')])
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Pruebas del historial de logs con números de secuencia."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.log_buffer import CursorMismatch, LogBuffer  # noqa: E402
+
+
+class LogBufferTest(unittest.TestCase):
+
+    def test_consulta_desde_un_cursor(self):
+        buffer = LogBuffer(capacity=3)
+        for i in range(5):
+            buffer.append('info', f'log {i}', '')
+        result = buffer.query(since=0, epoch=buffer.epoch)
+        self.assertEqual([log['seq'] for log in result['logs']], [3, 4, 5])
+        self.assertTrue(result['gap'])
+        self.assertEqual(buffer.query(since=4)['logs'][0]['message'], 'log 4')
+
+    def test_cada_buffer_tiene_su_epoch(self):
+        first, second = LogBuffer(), LogBuffer()
+        self.assertNotEqual(first.epoch, second.epoch)
+        record = first.append('info', 'hola', '')
+        self.assertEqual(record['epoch'], first.epoch)
+        with self.assertRaises(CursorMismatch):
+            second.query(since=record['seq'], epoch=first.epoch)
+
+
+
+class SharedLogBufferTest(unittest.TestCase):
+    """Varios workers (aquí, varios buffers) sobre el mismo archivo"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'logs.jsonl')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_secuencia_comun_y_consulta_desde_cualquier_worker(self):
+        first = LogBuffer(capacity=10, path=self.path)
+        second = LogBuffer(capacity=10, path=self.path)
+        self.assertEqual(first.epoch, second.epoch)
+
+        self.assertEqual(first.append('info', 'a', '')['seq'], 1)
+        self.assertEqual(second.append('info', 'b', '')['seq'], 2)
+        self.assertEqual(first.append('info', 'c', '')['seq'], 3)
+
+        for buffer in (first, second):
+            result = buffer.query(since=1, epoch=first.epoch)
+            self.assertEqual([log['message'] for log in result['logs']], ['b', 'c'])
+            self.assertEqual(result['lastSeq'], 3)
+            self.assertEqual(buffer.last_seq, 3)
+
+    def test_worker_que_arranca_despues_ve_el_historial(self):
+        first = LogBuffer(capacity=10, path=self.path)
+        first.append('info', 'a', '')
+        late = LogBuffer(capacity=10, path=self.path)
+        self.assertEqual([log['message'] for log in late.query()['logs']], ['a'])
+        self.assertEqual(late.append('info', 'b', '')['seq'], 2)
+
+    def test_compactacion_conserva_los_ultimos_registros(self):
+        first = LogBuffer(capacity=3, path=self.path)
+        second = LogBuffer(capacity=3, path=self.path)
+        for i in range(10):
+            (first if i % 2 else second).append('info', f'log {i}', '')
+
+        with open(self.path) as f:
+            self.assertLessEqual(len(f.readlines()), 2 * 3 + 1)
+        for buffer in (first, second):
+            result = buffer.query(since=0)
+            self.assertEqual([log['seq'] for log in result['logs']], [8, 9, 10])
+            self.assertTrue(result['gap'])
+
+    def test_linea_incompleta_se_lee_despues(self):
+        buffer = LogBuffer(capacity=10, path=self.path)
+        buffer.append('info', 'a', '')
+        with open(self.path, 'ab') as f:
+            f.write(b'{"seq": 2, "message": "b"')
+        self.assertEqual(buffer.query()['lastSeq'], 1)
+        with open(self.path, 'ab') as f:
+            f.write(b'}\n')
+        self.assertEqual(buffer.query()['lastSeq'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""Pruebas del perfilador bajo demanda: límites de la sesión y resultados."""
+import marshal
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services import profiler as profiler_module  # noqa: E402
+from services.profiler import MAX_REQUESTS, MAX_SECONDS, Profiler, ProfilerError  # noqa: E402
+
+
+def _trabajo(n=20000):
+    return sum(i * i for i in range(n))
+
+
+class SessionBoundsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_parametros_invalidos(self):
+        cases = [
+            {'mode': 'tracemalloc'},
+            {'seconds': 0},
+            {'seconds': MAX_SECONDS + 1},
+            {'seconds': 'abc'},
+            {'requests': 0},
+            {'requests': MAX_REQUESTS + 1},
+            {'interval_ms': None},
+        ]
+        for kwargs in cases:
+            with self.subTest(**kwargs):
+                with self.assertRaises(ProfilerError):
+                    self.profiler.start(**kwargs)
+        self.assertIsNone(self.profiler.session)
+
+    def test_una_sesion_a_la_vez(self):
+        first = self.profiler.start('cprofile', seconds=5)
+        with self.assertRaises(ProfilerError):
+            self.profiler.start('cprofile')
+        self.assertIs(self.profiler.session, first)
+
+        self.profiler.stop()
+        second = self.profiler.start('cprofile')
+        self.assertIsNot(second, first)
+
+    def test_termina_despues_de_n_llamadas(self):
+        session = self.profiler.start('cprofile', seconds=5, requests=2)
+        with self.profiler.profile('execute'):
+            with self.profiler.profile('execute'):
+                # La tercera llamada no se cuenta mientras las otras siguen en curso
+                with self.profiler.profile('execute'):
+                    pass
+                self.assertTrue(session.active)
+        self.assertFalse(session.active)
+        self.assertEqual(session.requests, 2)
+        self.assertEqual(session.status()['sections'], {'execute': 2})
+        self.assertIs(self.profiler.profile('execute'), profiler_module._NOOP_SECTION)
+
+    def test_termina_al_vencer_el_tiempo(self):
+        session = self.profiler.start('sampling', seconds=0.05, interval_ms=1)
+        self.assertTrue(session.active)
+        time.sleep(0.1)
+        self.assertFalse(session.active)
+        self.assertIs(self.profiler.profile('execute'), profiler_module._NOOP_SECTION)
+        # Una sesión vencida no impide empezar otra
+        self.profiler.start('cprofile')
+
+    def test_sin_sesion_no_hace_nada(self):
+        self.assertIs(self.profiler.profile('execute'), profiler_module._NOOP_SECTION)
+        self.assertIsNone(self.profiler.stop())
+
+    def test_cprofile_rechazado_con_eventlet(self):
+        with mock.patch.object(profiler_module, '_eventlet_patched', return_value=True):
+            with self.assertRaises(ProfilerError):
+                self.profiler.start('cprofile')
+        self.assertIsNone(self.profiler.session)
+
+
+class ResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_cprofile(self):
+        session = self.profiler.start('cprofile', requests=5)
+        with self.profiler.profile('execute'):
+            _trabajo()
+        self.profiler.stop()
+
+        self.assertEqual(session.profiled, 1)
+        self.assertIn('_trabajo', session.pstats_text(limit=20))
+        self.assertIn('_trabajo', session.collapsed())
+        self.assertIn(('_trabajo', 'test_profiler.py'),
+                      {(key[2], os.path.basename(key[0])) for key in marshal.loads(session.pstats_dump())})
+
+    def test_cprofile_llamadas_concurrentes(self):
+        session = self.profiler.start('cprofile', requests=10)
+        started = threading.Event()
+        release = threading.Event()
+
+        def ocupar():
+            with self.profiler.profile('execute'):
+                started.set()
+                release.wait(2)
+
+        worker = threading.Thread(target=ocupar)
+        worker.start()
+        started.wait(2)
+        # Con otra llamada perfilándose, esta se cuenta pero no se perfila
+        with self.profiler.profile('execute'):
+            _trabajo(100)
+        release.set()
+        worker.join()
+
+        self.assertEqual(session.requests, 2)
+        self.assertEqual(session.profiled, 1)
+
+    def test_sampling(self):
+        session = self.profiler.start('sampling', seconds=5, interval_ms=1)
+        with self.profiler.profile('generate_all'):
+            deadline = time.monotonic() + 0.2
+            while time.monotonic() < deadline and not session.samples:
+                _trabajo(2000)
+        self.profiler.stop()
+
+        self.assertGreater(session.samples, 0)
+        lines = session.collapsed().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('generate_all;'))
+            self.assertGreater(int(count), 0)
+        self.assertEqual(session.pstats_text(), '')
+
+
+class AdminEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Sin registro persistente: las pruebas no escriben en backend/data
+        os.environ['REGISTRY_PATH'] = ''
+        import app
+        cls.app = app
+        cls.client = app.app.test_client()
+
+    def tearDown(self):
+        self.app.profiler.stop()
+
+    def test_sin_admin_token_queda_cerrado(self):
+        with mock.patch.dict(os.environ, {'ADMIN_TOKEN': ''}):
+            response = self.client.post('/api/admin/profile', json={}, headers={'X-Admin-Token': ''})
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_incorrecto(self):
+        with mock.patch.dict(os.environ, {'ADMIN_TOKEN': 'secreto'}):
+            response = self.client.get('/api/admin/profile', headers={'X-Admin-Token': 'otro'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_sesion_por_la_api(self):
+        headers = {'X-Admin-Token': 'secreto'}
+        with mock.patch.dict(os.environ, {'ADMIN_TOKEN': 'secreto'}):
+            response = self.client.post('/api/admin/profile', json={'seconds': 999}, headers=headers)
+            self.assertEqual(response.status_code, 400)
+
+            response = self.client.post('/api/admin/profile', json={'mode': 'cprofile', 'requests': 3},
+                                        headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['session']['maxRequests'], 3)
+
+            response = self.client.post('/api/admin/profile', json={}, headers=headers)
+            self.assertEqual(response.status_code, 409)
+
+            response = self.client.post('/api/admin/profile/stop', headers=headers)
+            self.assertFalse(response.get_json()['session']['active'])
+
+            response = self.client.get('/api/admin/profile/result?format=prof', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get('/api/admin/profile/result?format=xml', headers=headers)
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Pruebas del registro persistente (log + snapshot)."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.registry import FileRegistry  # noqa: E402
+
+
+def _proc(name):
+    return {'name': name, 'returnType': 'int', 'parameters': []}
+
+
+class FileRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'registry')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_otro_proceso_ve_los_cambios(self):
+        FileRegistry(self.path).save('grpc', 'tcp', [_proc('suma'), _proc('resta')])
+        other = FileRegistry(self.path)
+        self.assertTrue(other.load_if_changed())
+        self.assertEqual(sorted(other.procedures), ['resta', 'suma'])
+        self.assertEqual(other.procedures['suma']['returnType'], 'int')
+        self.assertFalse(other.load_if_changed())
+
+    def test_rechaza_nombres_con_tabuladores_o_saltos_de_linea(self):
+        registry = FileRegistry(self.path)
+        for name in ('x\ty', 'x\ny', 'x\r', ''):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    registry.save('grpc', 'tcp', [_proc(name)])
+        with self.assertRaises(ValueError):
+            registry.save_artifacts('gr\npc', {})
+        self.assertFalse(os.path.exists(registry.log_path) and os.path.getsize(registry.log_path))
+
+    def test_linea_incompleta_al_final_se_descarta(self):
+        FileRegistry(self.path).save('grpc', 'tcp', [_proc('suma')])
+        with open(self.path + '.log', 'ab') as f:
+            f.write(b'P\tresta\t{"name": "res')
+
+        registry = FileRegistry(self.path)
+        registry.load_if_changed()
+        self.assertEqual(list(registry.procedures), ['suma'])
+
+        registry.save('grpc', 'tcp', [_proc('multiplica')])
+        other = FileRegistry(self.path)
+        other.load_if_changed()
+        self.assertEqual(sorted(other.procedures), ['multiplica', 'suma'])
+        self.assertEqual(other.procedures['multiplica']['name'], 'multiplica')
+
+    def test_lineas_invalidas_no_impiden_cargar(self):
+        FileRegistry(self.path).save('grpc', 'tcp', [_proc('suma')])
+        with open(self.path + '.log', 'ab') as f:
+            f.write(b'basura sin tabuladores\nM\t\t{no es json\n')
+        FileRegistry(self.path).save('grpc', 'tcp', [_proc('resta')])
+
+        registry = FileRegistry(self.path)
+        registry.load_if_changed()
+        self.assertEqual(sorted(registry.procedures), ['resta', 'suma'])
+        self.assertEqual(registry.protocol, 'grpc')
+
+    def test_compactar_conserva_el_estado(self):
+        registry = FileRegistry(self.path, compact_min_bytes=0)
+        registry.save('grpc', 'tcp', [_proc('suma')])
+        registry.save_artifacts('grpc', {'server.py': 'print(1)\n'})
+        registry.compact()
+
+        other = FileRegistry(self.path)
+        other.load_if_changed()
+        self.assertEqual(list(other.procedures), ['suma'])
+        self.assertEqual(other.artifacts, {'grpc': {'server.py': 'print(1)\n'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
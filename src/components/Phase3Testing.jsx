@@ -32,7 +32,8 @@ export default function Phase3Testing({ selectedProtocol, selectedTransport, pro
 
   // Conectar WebSocket cuando el componente se monta
   useEffect(() => {
-    const newSocket = io('http://localhost:8080');
+    // Solo websocket: en modo multi-proceso no hay sesiones sticky para long-polling
+    const newSocket = io('http://localhost:8080', { transports: ['websocket'] });
     
     newSocket.on('connect', () => {
       console.log('WebSocket conectado');